@@ -0,0 +1,135 @@
+import os
+import random
+
+import requests
+from locust import HttpUser, between, events, task
+
+
+# Run against a live server, e.g.
+#   locust -f benchmarks/locustfile.py --host http://localhost:8000 --headless \
+#       -u 100 -r 10 -t 1m --csv benchmark-results/locust LoginStorm
+# Pick scenarios by class name; with none given all of them run together.
+ACCOUNTS = int(os.environ.get("BENCH_ACCOUNTS", "20"))
+ITEMS = int(os.environ.get("BENCH_ITEMS", "200"))
+PASSWORD = "benchmark-password"
+
+shared = {}
+
+
+def account(i: int) -> dict:
+    return {
+        "email": f"bench{i}@bench.local",
+        "username": f"bench{i}",
+        "first_name": "Bench",
+        "last_name": "User",
+        "password": PASSWORD,
+    }
+
+
+@events.test_start.add_listener
+def seed(environment, **kwargs):
+    # Everything the scenarios share is created once, before users spawn.
+    http = requests.Session()
+    host = environment.host
+    for i in range(ACCOUNTS):
+        response = http.post(f"{host}/users/create", json=account(i))
+        assert response.status_code in (200, 409), response.text
+
+    response = http.post(f"{host}/token", data={"username": "bench0", "password": PASSWORD})
+    response.raise_for_status()
+    headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+    response = http.post(f"{host}/merchants", json={"name": "bench"}, headers=headers)
+    response.raise_for_status()
+    merchant_id = response.json()["id"]
+
+    rows = [{"name": f"bench item {i}", "price": 1} for i in range(ITEMS)]
+    response = http.post(f"{host}/items/import/{merchant_id}", json=rows, headers=headers)
+    response.raise_for_status()
+
+    item_ids = []
+    params = {"size": 500}
+    while True:
+        page = http.get(f"{host}/items", params=params).json()
+        item_ids += [item["id"] for item in page["items"] if item["name"].startswith("bench item")]
+        if not page["next_cursor"]:
+            break
+        params = {"size": 500, "after": page["next_cursor"]}
+
+    response = http.post(f"{host}/wallets", json={"name": "hot", "balance": 10**12}, headers=headers)
+    response.raise_for_status()
+
+    shared.update(headers=headers, item_ids=item_ids, hot_wallet_id=response.json()["id"])
+
+
+class ApiUser(HttpUser):
+    abstract = True
+    wait_time = between(0.01, 0.1)
+
+    def create_wallet(self, balance: float) -> int:
+        response = self.client.post(
+            "/wallets", json={"name": "bench", "balance": balance}, headers=shared["headers"]
+        )
+        return response.json()["id"]
+
+    def buy(self, wallet_id: int):
+        self.client.post(
+            "/buy_item",
+            params={"item_id": random.choice(shared["item_ids"]), "wallet_id": wallet_id},
+            headers=shared["headers"],
+            name="/buy_item",
+        )
+
+
+class LoginStorm(ApiUser):
+    @task
+    def login(self):
+        credentials = account(random.randrange(ACCOUNTS))
+        self.client.post(
+            "/token", data={"username": credentials["username"], "password": PASSWORD}
+        )
+
+
+class WalletPolling(ApiUser):
+    def on_start(self):
+        self.wallet_id = self.create_wallet(0)
+        self.etag = None
+
+    @task
+    def poll(self):
+        headers = {"If-None-Match": self.etag} if self.etag else {}
+        response = self.client.get(f"/wallets/{self.wallet_id}", headers=headers, name="/wallets/{id}")
+        self.etag = response.headers.get("ETag", self.etag)
+
+
+class HotWalletPurchase(ApiUser):
+    # every user debits the same wallet row
+    @task
+    def purchase(self):
+        self.buy(shared["hot_wallet_id"])
+
+
+class ColdWalletPurchase(ApiUser):
+    # one wallet per user, so only merchant credits contend
+    def on_start(self):
+        self.wallet_id = self.create_wallet(10**9)
+
+    @task
+    def purchase(self):
+        self.buy(self.wallet_id)
+
+
+class PaginatedReads(ApiUser):
+    @task
+    def walk_items(self):
+        params = {"size": 50}
+        for _ in range(5):
+            response = self.client.get("/items", params=params, name="/items")
+            cursor = response.json().get("next_cursor")
+            if not cursor:
+                break
+            params = {"size": 50, "after": cursor}
+
+    @task
+    def walk_transactions(self):
+        self.client.get("/transactions", params={"size": 50, "page": random.randint(1, 5)}, name="/transactions")
@@ -0,0 +1,102 @@
+import argparse
+import asyncio
+import pathlib
+import tempfile
+
+from sqlmodel import select
+from walletapi import config, deps, models, purchase, security
+from walletapi.main import create_app, init_components
+
+from .results import measure, measure_async, write_result
+
+
+# In-process timings against the aiosqlite stand-in: no HTTP, no network, so
+# changes in the code paths themselves show up rather than transport noise.
+async def seed(items: int):
+    user = models.DBUser(
+        username="bench", email="bench@bench.local", first_name="Bench", last_name="Bench"
+    )
+    await user.set_password("password")
+    async with models.session_factory() as session:
+        session.add(user)
+        await session.commit()
+        await session.refresh(user)
+
+        merchant = models.DBMerchant(name="bench", user_id=user.id)
+        session.add(merchant)
+        await session.commit()
+        await session.refresh(merchant)
+
+        session.add_all(
+            models.DBItem(name=f"item{i}", price=1, merchant_id=merchant.id, user_id=user.id)
+            for i in range(items)
+        )
+        wallet = models.DBWallet(name="bench", balance=10**9)
+        session.add(wallet)
+        await session.commit()
+        await session.refresh(wallet)
+        item_id = (await session.exec(select(models.DBItem.id).limit(1))).one()
+    return user, wallet, item_id
+
+
+async def run(iterations: int, items: int) -> dict:
+    user, wallet, item_id = await seed(items)
+    token = security.create_access_token(data={"sub": user.id})
+
+    async def buy_item():
+        async with models.session_factory() as session:
+            await purchase.buy_item(session, item_id, wallet.id)
+
+    async def current_user_cold():
+        deps.principal_cache.clear()
+        async with models.session_factory() as session:
+            await deps.get_current_user(token, session)
+
+    async def current_user_warm():
+        async with models.session_factory() as session:
+            await deps.get_current_user(token, session)
+
+    results = {}
+    results["buy_item_hot_wallet"] = await measure_async(buy_item, iterations)
+    results["get_current_user_cold"] = await measure_async(current_user_cold, iterations)
+    results["get_current_user_warm"] = await measure_async(current_user_warm, iterations)
+
+    async with models.session_factory() as session:
+        db_items = (await session.exec(select(models.DBItem).limit(items))).all()
+
+    def serialise_items():
+        models.ItemList(items=db_items, size_per_page=len(db_items)).model_dump_json()
+
+    results[f"item_list_serialise_{len(db_items)}"] = measure(serialise_items, iterations)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Micro-benchmarks of hot code paths")
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--items", type=int, default=500)
+    parser.add_argument("--output", help="write the JSON result to this file")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        settings = config.Settings(
+            SQLDB_URL=f"sqlite+aiosqlite:///{pathlib.Path(directory) / 'bench.db'}",
+            SECRET_KEY="benchmark",
+            MERCHANT_BALANCE_FOLD_INTERVAL=0,
+        )
+        create_app(settings)
+        init_components(settings)
+
+        async def go():
+            await models.recreate_table()
+            try:
+                return await run(args.iterations, args.items)
+            finally:
+                await models.close_session()
+
+        results = asyncio.run(go())
+    write_result("micro", results, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+import datetime
+import json
+import platform
+import subprocess
+import time
+
+
+def git_commit() -> str | None:
+    try:
+        completed = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return completed.stdout.strip()
+
+
+def measure(func, iterations: int) -> dict:
+    samples = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - started)
+    return summarize(samples)
+
+
+async def measure_async(func, iterations: int) -> dict:
+    samples = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        await func()
+        samples.append(time.perf_counter() - started)
+    return summarize(samples)
+
+
+def summarize(samples: list[float]) -> dict:
+    samples = sorted(samples)
+    return {
+        "count": len(samples),
+        "min": samples[0],
+        "median": samples[len(samples) // 2],
+        "p95": samples[int(len(samples) * 0.95) - 1] if len(samples) >= 20 else samples[-1],
+        "max": samples[-1],
+        "mean": sum(samples) / len(samples),
+    }
+
+
+def write_result(benchmark: str, results: dict, output: str | None = None) -> dict:
+    # one JSON document per run, so runs on different commits can be diffed
+    document = {
+        "benchmark": benchmark,
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "created_at": datetime.datetime.now(tz=datetime.timezone.utc).isoformat(),
+        "results": results,
+    }
+    data = json.dumps(document, indent=2)
+    if output:
+        with open(output, "w") as f:
+            f.write(data)
+    print(data)
+    return document
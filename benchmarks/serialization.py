@@ -0,0 +1,90 @@
+import argparse
+import asyncio
+import pathlib
+import tempfile
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from sqlmodel import select
+from walletapi import config, models, pagination
+from walletapi.main import create_app, init_components
+
+from .results import measure_async, write_result
+
+
+# Per-row cost of a list page: the old path fetched ORM instances, built
+# ItemList, let response_model validate it again and encoded it with json;
+# the new one fetches column rows and hands dicts to orjson.
+async def seed(rows: int):
+    async with models.session_factory() as session:
+        user = models.DBUser(
+            username="bench", email="bench@bench.local", first_name="Bench",
+            last_name="Bench", password="x",
+        )
+        session.add(user)
+        await session.commit()
+        await session.refresh(user)
+        session.add_all(
+            models.DBItem(name=f"item{i}", description="benchmark item", price=i, tax=0.07, user_id=user.id)
+            for i in range(rows)
+        )
+        await session.commit()
+
+
+async def orm_page(size: int):
+    async with models.session_factory() as session:
+        rows = (await session.exec(select(models.DBItem).order_by(models.DBItem.id).limit(size))).all()
+    page = models.ItemList(items=rows, page=1, page_count=1, size_per_page=size)
+    # what response_model did with the returned model
+    validated = models.ItemList.model_validate(page.model_dump())
+    return JSONResponse(jsonable_encoder(validated)).body
+
+
+async def column_page(size: int):
+    async with models.session_factory() as session:
+        query = select(*pagination.columns(models.DBItem, models.Item, models.DBItem.version))
+        rows = (await session.exec(query.order_by(models.DBItem.id).limit(size))).all()
+    return pagination.page_response("items", rows, 1, 1, size, None, exclude={"version"}).body
+
+
+async def run(iterations: int, size: int) -> dict:
+    await seed(size)
+    assert len(await orm_page(size)) and len(await column_page(size))
+
+    results = {}
+    for name, func in (("orm_validate_twice", orm_page), ("columns_orjson", column_page)):
+        timing = await measure_async(lambda: func(size), iterations)
+        timing["per_row"] = timing["median"] / size
+        results[f"{name}_{size}_rows"] = timing
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="List page serialisation cost")
+    parser.add_argument("--iterations", type=int, default=500)
+    parser.add_argument("--rows", type=int, default=50)
+    parser.add_argument("--output", help="write the JSON result to this file")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        settings = config.Settings(
+            SQLDB_URL=f"sqlite+aiosqlite:///{pathlib.Path(directory) / 'bench.db'}",
+            SECRET_KEY="benchmark",
+            MERCHANT_BALANCE_FOLD_INTERVAL=0,
+        )
+        create_app(settings)
+        init_components(settings)
+
+        async def go():
+            await models.recreate_table()
+            try:
+                return await run(args.iterations, args.rows)
+            finally:
+                await models.close_session()
+
+        results = asyncio.run(go())
+    write_result("serialization", results, args.output)
+
+
+if __name__ == "__main__":
+    main()
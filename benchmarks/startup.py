@@ -0,0 +1,55 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+from .results import summarize, write_result
+
+
+# Runs in a fresh interpreter each time so nothing is already imported.
+PROBE = """
+import json, time
+start = time.perf_counter()
+from walletapi import config, main
+imported = time.perf_counter()
+settings = config.Settings()
+app = main.create_app(settings)
+main.init_components(settings)
+created = time.perf_counter()
+print(json.dumps({"import": imported - start, "create_app": created - imported}))
+"""
+
+
+def run_once(env: dict) -> dict:
+    completed = subprocess.run(
+        [sys.executable, "-c", PROBE],
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(completed.stdout.splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure walletapi cold start")
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--output", help="write the JSON result to this file")
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    env.setdefault("SQLDB_URL", "sqlite+aiosqlite:///:memory:")
+    env.setdefault("SECRET_KEY", "benchmark")
+
+    runs = [run_once(env) for _ in range(args.runs)]
+    results = {
+        "import_seconds": summarize([run["import"] for run in runs]),
+        "create_app_seconds": summarize([run["create_app"] for run in runs]),
+        "total_seconds": summarize([run["import"] + run["create_app"] for run in runs]),
+    }
+    write_result("startup", results, args.output)
+
+
+if __name__ == "__main__":
+    main()
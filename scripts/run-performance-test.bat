@@ -1 +1,5 @@
-poetry run locust -f performance-tests/test_index.py
\ No newline at end of file
+if not exist benchmark-results mkdir benchmark-results
+poetry run locust -f benchmarks/locustfile.py --host http://localhost:8000 --headless -u 100 -r 10 -t 1m --csv benchmark-results/locust
+poetry run python -m benchmarks.micro --output benchmark-results/micro.json
+poetry run python -m benchmarks.startup --output benchmark-results/startup.json
+poetry run python -m benchmarks.serialization --output benchmark-results/serialization.json
@@ -39,6 +39,7 @@ def app_fixture(event_loop):
         path.mkdir()
 
     app = main.create_app(settings)
+    main.init_components(settings)
 
     asyncio.run(models.recreate_table())
 
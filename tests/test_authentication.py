@@ -0,0 +1,136 @@
+import time
+
+from httpx import AsyncClient
+from pytest_mock import MockerFixture
+from walletapi import config, last_login, models, query_detector, revocation, throttle
+import pytest
+
+
+@pytest.mark.asyncio
+async def test_login_buffers_last_login(
+    client: AsyncClient, session: models.AsyncSession, user1: models.DBUser
+):
+    with query_detector.expect_queries(1) as tracker:
+        response = await client.post(
+            "/token", data={"username": user1.username, "password": "123456"}
+        )
+    assert response.status_code == 200
+    assert not any(statement.startswith("UPDATE") for statement, _ in tracker.statements)
+    login_date = last_login.pending[user1.id]
+
+    assert await last_login.flush() == 1
+    assert last_login.pending == {}
+    db_user = await session.get(models.DBUser, user1.id, populate_existing=True)
+    assert db_user.last_login_date == login_date
+    assert await last_login.flush() == 0
+
+
+@pytest.mark.asyncio
+async def test_failed_flush_keeps_batch(monkeypatch: pytest.MonkeyPatch, user1: models.DBUser):
+    def broken_factory():
+        raise RuntimeError("database down")
+
+    monkeypatch.setattr(last_login, "pending", {user1.id: user1.last_login_date})
+    monkeypatch.setattr(models, "session_factory", broken_factory)
+    with pytest.raises(RuntimeError):
+        await last_login.flush()
+    assert user1.id in last_login.pending
+
+
+@pytest.mark.asyncio
+async def test_refresh_token_rotation(
+    client: AsyncClient, token_user1: models.Token, mocker: MockerFixture
+):
+    verify = mocker.spy(models.DBUser, "verify_password")
+
+    with query_detector.expect_queries(0):
+        response = await client.post(
+            "/token/refresh", data={"refresh_token": token_user1.refresh_token}
+        )
+    assert response.status_code == 200
+    tokens = response.json()
+    assert tokens["user_id"] == token_user1.user_id
+    assert tokens["refresh_token"] != token_user1.refresh_token
+    verify.assert_not_called()
+
+    response = await client.get(
+        "/users/me", headers={"Authorization": f"Bearer {tokens['access_token']}"}
+    )
+    assert response.status_code == 200
+
+    # the rotated-out token cannot be redeemed twice
+    response = await client.post(
+        "/token/refresh", data={"refresh_token": token_user1.refresh_token}
+    )
+    assert response.status_code == 401
+
+    response = await client.post(
+        "/token/refresh", data={"refresh_token": tokens["refresh_token"]}
+    )
+    assert response.status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_token_types_are_not_interchangeable(
+    client: AsyncClient, token_user1: models.Token
+):
+    response = await client.post(
+        "/token/refresh", data={"refresh_token": token_user1.access_token}
+    )
+    assert response.status_code == 401
+
+    response = await client.get(
+        "/users/me", headers={"Authorization": f"Bearer {token_user1.refresh_token}"}
+    )
+    assert response.status_code == 401
+
+
+@pytest.mark.asyncio
+async def test_revocation_list_persists(tmp_path, monkeypatch: pytest.MonkeyPatch):
+    for name in ("revoked", "path", "dirty"):
+        monkeypatch.setattr(revocation, name, getattr(revocation, name))
+    settings = config.get_settings().model_copy(
+        update={"TOKEN_REVOCATION_FILE": str(tmp_path / "revoked.json")}
+    )
+    revocation.init_revocation(settings)
+    revocation.revoke("live", time.time() + 60)
+    revocation.revoke("expired", time.time() - 1)
+    await revocation.save()
+
+    revocation.init_revocation(settings)
+    assert revocation.is_revoked("live")
+    assert "expired" not in revocation.revoked
+
+
+@pytest.mark.asyncio
+async def test_login_throttle(
+    client: AsyncClient, user1: models.DBUser, monkeypatch: pytest.MonkeyPatch, mocker: MockerFixture
+):
+    monkeypatch.setattr(throttle, "by_username", throttle.TokenBucketLimiter(rate=0.1, burst=2))
+    monkeypatch.setattr(throttle, "by_ip", throttle.TokenBucketLimiter(rate=1, burst=100))
+    verify = mocker.spy(models.DBUser, "verify_password")
+
+    for _ in range(2):
+        response = await client.post("/token", data={"username": user1.username, "password": "wrong"})
+        assert response.status_code == 401
+
+    response = await client.post("/token", data={"username": user1.username.upper(), "password": "123456"})
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) >= 1
+    assert verify.call_count == 2
+    assert throttle.stats()["username"]["rejected"] == 1
+
+    # other accounts from the same address are unaffected
+    response = await client.post("/token", data={"username": "nobody", "password": "x"})
+    assert response.status_code == 401
+
+
+def test_throttle_evicts_least_recently_used():
+    limiter = throttle.TokenBucketLimiter(rate=1, burst=1, maxsize=2)
+    assert limiter.acquire("a") == 0
+    assert limiter.acquire("b") == 0
+    assert limiter.acquire("a") > 0
+    assert limiter.acquire("c") == 0
+
+    assert list(limiter.buckets) == ["a", "c"]
+    assert limiter.evictions == 1
@@ -0,0 +1,154 @@
+import asyncio
+
+from httpx import AsyncClient
+from sqlmodel import select, func
+from walletapi import models
+import pytest
+
+
+async def create_item_and_wallet(
+    session: models.AsyncSession,
+    merchant: models.DBMerchant,
+    price: float,
+    balance: float,
+) -> tuple[models.DBItem, models.DBWallet]:
+    item = models.DBItem(
+        name="item", price=price, merchant_id=merchant.id, user_id=merchant.user_id
+    )
+    wallet = models.DBWallet(name="wallet", balance=balance)
+    session.add(item)
+    session.add(wallet)
+    await session.commit()
+    await session.refresh(item)
+    await session.refresh(wallet)
+    return item, wallet
+
+
+@pytest.mark.asyncio
+async def test_buy_item(
+    client: AsyncClient,
+    token_user1: models.Token,
+    session: models.AsyncSession,
+    merchant_user1: models.DBMerchant,
+):
+    headers = {"Authorization": f"{token_user1.token_type} {token_user1.access_token}"}
+    item, wallet = await create_item_and_wallet(session, merchant_user1, 10, 25)
+
+    response = await client.post(
+        "/buy_item", params={"item_id": item.id, "wallet_id": wallet.id}, headers=headers
+    )
+    data = response.json()
+
+    assert response.status_code == 200
+    assert data["amount"] == 15
+    assert data["item"]["item_id"] == item.id
+    assert data["merchant"]["name"] == merchant_user1.name
+
+
+@pytest.mark.asyncio
+async def test_buy_item_errors(
+    client: AsyncClient,
+    token_user1: models.Token,
+    session: models.AsyncSession,
+    merchant_user1: models.DBMerchant,
+):
+    headers = {"Authorization": f"{token_user1.token_type} {token_user1.access_token}"}
+    item, wallet = await create_item_and_wallet(session, merchant_user1, 10, 5)
+
+    response = await client.post(
+        "/buy_item", params={"item_id": item.id, "wallet_id": wallet.id}, headers=headers
+    )
+    assert response.status_code == 400
+
+    response = await client.post(
+        "/buy_item", params={"item_id": item.id, "wallet_id": 0}, headers=headers
+    )
+    assert response.status_code == 404
+
+    response = await client.post(
+        "/buy_item", params={"item_id": 0, "wallet_id": wallet.id}, headers=headers
+    )
+    assert response.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_concurrent_buy_item_never_overdraws(
+    client: AsyncClient,
+    token_user1: models.Token,
+    session: models.AsyncSession,
+    merchant_user1: models.DBMerchant,
+):
+    headers = {"Authorization": f"{token_user1.token_type} {token_user1.access_token}"}
+    item, wallet = await create_item_and_wallet(session, merchant_user1, 1, 100)
+    merchant = await session.get(
+        models.DBMerchant, merchant_user1.id, populate_existing=True
+    )
+    merchant_balance = merchant.balance
+
+    responses = await asyncio.gather(
+        *[
+            client.post(
+                "/buy_item",
+                params={"item_id": item.id, "wallet_id": wallet.id},
+                headers=headers,
+            )
+            for _ in range(200)
+        ]
+    )
+    status_codes = [response.status_code for response in responses]
+
+    assert 500 not in status_codes
+    assert status_codes.count(200) == 100
+    assert status_codes.count(400) == 100
+    assert all(
+        response.json()["detail"] == "Insufficient balance"
+        for response in responses
+        if response.status_code == 400
+    )
+
+    await session.refresh(wallet)
+    await session.refresh(merchant)
+    assert wallet.balance == 0
+    assert merchant.balance == merchant_balance + 100
+
+    result = await session.exec(
+        select(func.count(models.DBTransaction.id)).where(
+            models.DBTransaction.wallet_id == wallet.id
+        )
+    )
+    assert result.one() == 100
+
+
+@pytest.mark.asyncio
+async def test_buy_items_batch(
+    client: AsyncClient,
+    token_user1: models.Token,
+    session: models.AsyncSession,
+    merchant_user1: models.DBMerchant,
+):
+    headers = {"Authorization": f"{token_user1.token_type} {token_user1.access_token}"}
+    item1, wallet = await create_item_and_wallet(session, merchant_user1, 10, 50)
+    item2, _ = await create_item_and_wallet(session, merchant_user1, 5, 0)
+
+    payload = {
+        "wallet_id": wallet.id,
+        "items": [{"item_id": item1.id, "quantity": 2}, {"item_id": item2.id}],
+    }
+    response = await client.post("/buy_item/batch", json=payload, headers=headers)
+    data = response.json()
+
+    assert response.status_code == 200
+    assert [line["item"]["item_id"] for line in data] == [item1.id, item1.id, item2.id]
+    assert data[-1]["amount"] == 25
+
+    # all-or-nothing: the second line cannot be afforded, nothing is applied
+    payload["items"] = [{"item_id": item2.id}, {"item_id": item1.id, "quantity": 3}]
+    response = await client.post("/buy_item/batch", json=payload, headers=headers)
+    assert response.status_code == 400
+
+    payload["items"] = [{"item_id": item2.id}, {"item_id": 0}]
+    response = await client.post("/buy_item/batch", json=payload, headers=headers)
+    assert response.status_code == 404
+
+    await session.refresh(wallet)
+    assert wallet.balance == 25
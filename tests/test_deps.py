@@ -0,0 +1,64 @@
+import asyncio
+import datetime
+
+from httpx import AsyncClient
+from walletapi import deps, models, security
+import pytest
+
+
+def auth_headers(user: models.DBUser, expires_delta: datetime.timedelta) -> dict:
+    token = security.create_access_token(
+        data={"sub": user.id}, expires_delta=expires_delta
+    )
+    return {"Authorization": f"Bearer {token}"}
+
+
+@pytest.mark.asyncio
+async def test_repeat_token_skips_decode_and_lookup(
+    client: AsyncClient, user1: models.DBUser, mocker
+):
+    headers = auth_headers(user1, datetime.timedelta(minutes=5))
+    decode = mocker.spy(deps.jwt, "decode")
+    get = mocker.spy(models.AsyncSession, "get")
+
+    for _ in range(3):
+        response = await client.get("/users/me", headers=headers)
+        assert response.status_code == 200
+        assert response.json()["id"] == user1.id
+
+    assert decode.call_count == 1
+    assert get.call_count == 1
+
+
+@pytest.mark.asyncio
+async def test_cache_entry_expires_with_token(client: AsyncClient, user1: models.DBUser):
+    headers = auth_headers(user1, datetime.timedelta(seconds=1))
+
+    response = await client.get("/users/me", headers=headers)
+    assert response.status_code == 200
+
+    await asyncio.sleep(1.1)
+    response = await client.get("/users/me", headers=headers)
+    assert response.status_code == 401
+
+
+@pytest.mark.asyncio
+async def test_change_password_invalidates_user(
+    client: AsyncClient, user1: models.DBUser
+):
+    headers = auth_headers(user1, datetime.timedelta(minutes=5))
+    response = await client.get("/users/me", headers=headers)
+    assert response.status_code == 200
+    assert deps.principal_cache.tags.get(user1.id)
+
+    response = await client.put(
+        f"/users/{user1.id}/change_password",
+        json={"current_password": "123456", "new_password": "123456"},
+        headers=headers,
+    )
+    assert response.status_code == 200
+    assert user1.id not in deps.principal_cache.tags
+
+    stats = deps.principal_cache.stats()
+    assert stats["hits"] > 0
+    assert stats["misses"] > 0
@@ -0,0 +1,70 @@
+import asyncio
+import time
+
+from httpx import AsyncClient
+from walletapi import hashing, models
+import pytest
+
+
+@pytest.mark.asyncio
+async def test_hashing_service_rejects_when_saturated():
+    service = hashing.HashingService(workers=1, queue_limit=1)
+
+    blockers = [asyncio.create_task(service.run(time.sleep, 0.2)) for _ in range(2)]
+    await asyncio.sleep(0)
+
+    with pytest.raises(hashing.HashingBusyError):
+        await service.hash_password("password")
+
+    await asyncio.gather(*blockers)
+    stats = service.stats()
+    service.shutdown()
+
+    assert stats["completed"] == 2
+    assert stats["rejected"] == 1
+    assert stats["in_flight"] == 0
+    assert stats["wait_seconds_total"] > 0
+
+
+@pytest.mark.asyncio
+async def test_token_busy_returns_503(
+    client: AsyncClient, user1: models.DBUser, monkeypatch: pytest.MonkeyPatch
+):
+    service = hashing.HashingService(workers=1, queue_limit=0)
+    monkeypatch.setattr(hashing, "service", service)
+
+    blocker = asyncio.create_task(service.run(time.sleep, 0.2))
+    await asyncio.sleep(0)
+
+    response = await client.post(
+        "/token", data={"username": user1.username, "password": "123456"}
+    )
+    await blocker
+    service.shutdown()
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+
+
+@pytest.mark.asyncio
+async def test_create_user_and_login(client: AsyncClient):
+    payload = {
+        "email": "hashing@test.com",
+        "username": "hashing",
+        "first_name": "Firstname",
+        "last_name": "Lastname",
+        "password": "password",
+    }
+    response = await client.post("/users/create", json=payload)
+    assert response.status_code == 200
+
+    response = await client.post(
+        "/token", data={"username": "hashing", "password": "password"}
+    )
+    assert response.status_code == 200
+    assert response.json()["access_token"]
+
+    response = await client.post(
+        "/token", data={"username": "hashing", "password": "wrong"}
+    )
+    assert response.status_code == 401
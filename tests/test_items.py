@@ -0,0 +1,160 @@
+import json
+
+from httpx import AsyncClient
+from sqlmodel import select, func
+from walletapi import catalog_import, entity_cache, models
+import pytest
+
+
+async def count_items(session: models.AsyncSession, merchant_id: int) -> int:
+    result = await session.exec(
+        select(func.count(models.DBItem.id)).where(models.DBItem.merchant_id == merchant_id)
+    )
+    return result.one()
+
+
+@pytest.mark.asyncio
+async def test_import_items_json(
+    client: AsyncClient,
+    token_user1: models.Token,
+    session: models.AsyncSession,
+    merchant_user1: models.DBMerchant,
+    monkeypatch: pytest.MonkeyPatch,
+):
+    monkeypatch.setattr(catalog_import, "IMPORT_CHUNK_SIZE", 7)
+    headers = {
+        "Authorization": f"{token_user1.token_type} {token_user1.access_token}",
+        "Content-Type": "application/json",
+    }
+    before = await count_items(session, merchant_user1.id)
+    rows = [{"name": f"sku{i}", "price": i} for i in range(20)]
+    rows[5] = {"price": "free"}
+
+    async def body():
+        data = json.dumps(rows).encode("utf-8")
+        for i in range(0, len(data), 16):
+            yield data[i : i + 16]
+
+    response = await client.post(
+        f"/items/import/{merchant_user1.id}", content=body(), headers=headers
+    )
+    data = response.json()
+
+    assert response.status_code == 200
+    assert data["imported"] == 19
+    assert data["failed"] == 1
+    assert data["errors"][0]["row"] == 6
+    assert await count_items(session, merchant_user1.id) == before + 19
+
+
+@pytest.mark.asyncio
+async def test_import_items_csv(
+    client: AsyncClient,
+    token_user1: models.Token,
+    session: models.AsyncSession,
+    merchant_user1: models.DBMerchant,
+):
+    headers = {
+        "Authorization": f"{token_user1.token_type} {token_user1.access_token}",
+        "Content-Type": "text/csv",
+    }
+    before = await count_items(session, merchant_user1.id)
+    body = 'name,description,price\ncsv1,,1.5\n"csv2","two\nlines",2\ncsv3,,abc\n'
+
+    response = await client.post(
+        f"/items/import/{merchant_user1.id}", content=body, headers=headers
+    )
+    data = response.json()
+
+    assert response.status_code == 200
+    assert data["imported"] == 2
+    assert data["failed"] == 1
+    assert await count_items(session, merchant_user1.id) == before + 2
+
+
+@pytest.mark.asyncio
+async def test_import_items_rejects_bad_input(
+    client: AsyncClient, token_user1: models.Token, merchant_user1: models.DBMerchant
+):
+    headers = {
+        "Authorization": f"{token_user1.token_type} {token_user1.access_token}",
+        "Content-Type": "application/json",
+    }
+    response = await client.post(
+        f"/items/import/{merchant_user1.id}", content='{"name": "x"}', headers=headers
+    )
+    assert response.status_code == 400
+
+    response = await client.post("/items/import/0", content="[]", headers=headers)
+    assert response.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_item_etag(
+    client: AsyncClient, token_user1: models.Token, merchant_user1: models.DBMerchant
+):
+    headers = {"Authorization": f"{token_user1.token_type} {token_user1.access_token}"}
+    response = await client.get("/items", params={"size": 5})
+    list_etag = response.headers["ETag"]
+    item = response.json()["items"][0]
+
+    response = await client.get(
+        "/items", params={"size": 5}, headers={"If-None-Match": list_etag}
+    )
+    assert response.status_code == 304
+
+    response = await client.get(f"/items/{item['id']}")
+    etag = response.headers["ETag"]
+    response = await client.get(f"/items/{item['id']}", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+
+    item["price"] += 1
+    response = await client.put(f"/items/{item['id']}", json=item, headers=headers)
+    assert response.status_code == 200
+
+    response = await client.get(f"/items/{item['id']}", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    response = await client.get(
+        "/items", params={"size": 5}, headers={"If-None-Match": list_etag}
+    )
+    assert response.status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_entity_cache(
+    client: AsyncClient,
+    token_user1: models.Token,
+    session: models.AsyncSession,
+    merchant_user1: models.DBMerchant,
+):
+    headers = {"Authorization": f"{token_user1.token_type} {token_user1.access_token}"}
+    db_item = models.DBItem(
+        name="cached", price=3, merchant_id=merchant_user1.id, user_id=merchant_user1.user_id
+    )
+    session.add(db_item)
+    await session.commit()
+    await session.refresh(db_item)
+    item = models.Item.model_validate(db_item).model_dump()
+
+    await client.get(f"/items/{item['id']}")
+    hits = entity_cache.items.hits
+    response = await client.get(f"/items/{item['id']}")
+    assert response.json()["price"] == 3
+    assert entity_cache.items.hits == hits + 1
+
+    item["price"] = 4
+    await client.put(f"/items/{item['id']}", json=item, headers=headers)
+    response = await client.get(f"/items/{item['id']}")
+    assert response.json()["price"] == 4
+
+    merchant = {"name": "renamed", "balance": 0, "user_id": merchant_user1.user_id}
+    await client.get(f"/merchants/{merchant_user1.id}")
+    await client.put(f"/merchants/{merchant_user1.id}", json=merchant, headers=headers)
+    response = await client.get(f"/merchants/{merchant_user1.id}")
+    assert response.json()["name"] == "renamed"
+    assert entity_cache.items.get(item["id"]) is None
+
+    response = await client.delete(f"/items/{item['id']}", headers=headers)
+    response = await client.get(f"/items/{item['id']}")
+    assert response.status_code == 404
+    assert entity_cache.stats()["items"]["hits"] > 0
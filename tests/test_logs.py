@@ -0,0 +1,42 @@
+import json
+import logging
+
+from httpx import AsyncClient
+from walletapi import logs
+import pytest
+
+
+@pytest.mark.asyncio
+async def test_request_id(client: AsyncClient):
+    response = await client.get("/items", headers={"X-Request-ID": "abc123"})
+    assert response.headers["X-Request-ID"] == "abc123"
+
+    response = await client.get("/items")
+    assert len(response.headers["X-Request-ID"]) == 32
+
+
+def test_json_records():
+    token = logs.request_id.set("req-1")
+    try:
+        record = logs.record_factory(
+            "walletapi.test", logging.INFO, __file__, 1, "page %s", (2,), None
+        )
+    finally:
+        logs.request_id.reset(token)
+    record.rows = 50
+
+    data = json.loads(logs.JsonFormatter().format(logs.QueueHandler(None).prepare(record)))
+    assert data["message"] == "page 2"
+    assert data["request_id"] == "req-1"
+    assert data["rows"] == 50
+    assert data["level"] == "INFO"
+
+
+@pytest.mark.asyncio
+async def test_invalid_token_is_logged(client: AsyncClient, caplog: pytest.LogCaptureFixture):
+    with caplog.at_level(logging.INFO, logger="walletapi.deps"):
+        response = await client.get("/users/me", headers={"Authorization": "Bearer junk"})
+    assert response.status_code == 401
+    record = next(record for record in caplog.records if record.message == "invalid token")
+    assert record.request_id
+    assert record.error
@@ -0,0 +1,78 @@
+import subprocess
+import sys
+
+from fastapi import FastAPI
+from httpx import AsyncClient
+from walletapi import cli, config, main, models
+import pytest
+
+
+def test_create_app_shares_settings(app: FastAPI):
+    assert config.get_settings() is app.state.settings
+
+
+def test_import_is_lazy():
+    probe = (
+        "import sys, walletapi.main; "
+        "print(sorted(m for m in sys.modules if m.startswith(('gevent', 'walletapi.routers.'))))"
+    )
+    completed = subprocess.run(
+        [sys.executable, "-c", probe], capture_output=True, text=True, check=True
+    )
+    assert completed.stdout.strip() == "[]"
+
+
+@pytest.mark.asyncio
+async def test_lifespan_initialises_components(app: FastAPI, mocker):
+    settings = app.state.settings.model_copy(
+        update={"MERCHANT_BALANCE_FOLD_INTERVAL": 0, "LAST_LOGIN_FLUSH_INTERVAL": 0}
+    )
+    mocker.patch.object(config, "settings", config.settings)
+    worker_app = main.create_app(settings)
+    init_components = mocker.patch.object(main, "init_components")
+    for name in ("hashing", "logs"):
+        mocker.patch.object(getattr(main, name), "shutdown")
+    mocker.patch.object(main.models, "close_session", mocker.AsyncMock())
+
+    init_components.assert_not_called()
+    async with main.lifespan(worker_app):
+        init_components.assert_called_once_with(settings)
+    main.models.close_session.assert_awaited_once()
+
+
+def test_cli_serve(mocker):
+    run = mocker.patch.object(cli.uvicorn, "run")
+    cli.main(["serve", "--workers", "4", "--port", "9000", "--graceful-timeout", "15"])
+
+    run.assert_called_once()
+    args, kwargs = run.call_args
+    assert args == ("walletapi.main:create_app",)
+    assert kwargs["factory"] is True
+    assert kwargs["workers"] == 4
+    assert kwargs["port"] == 9000
+    assert kwargs["timeout_graceful_shutdown"] == 15
+
+
+@pytest.mark.asyncio
+async def test_metrics(client: AsyncClient, merchant_user1: models.DBMerchant):
+    response = await client.get(f"/merchants/{merchant_user1.id}")
+    assert response.status_code == 200
+
+    response = await client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    text = response.text
+    assert 'walletapi_http_requests_total{method="GET",route="/merchants/{merchant_id}",status="200"}' in text
+    assert 'walletapi_http_request_db_queries_count{method="GET",route="/merchants/{merchant_id}"}' in text
+    assert "walletapi_db_queries_total " in text
+    assert "walletapi_db_pool_checkout_wait_seconds_count " in text
+    assert 'walletapi_cache{cache="principal",stat="hit_ratio"}' in text
+    assert 'walletapi_hashing{stat="in_flight"}' in text
+
+    queries = 'walletapi_http_request_db_queries_sum{method="GET",route="/merchants/{merchant_id}"} '
+    line = next(line for line in text.splitlines() if line.startswith(queries))
+    assert float(line.split()[-1]) > 0
+
+    # the route template, not the raw path, labels the series
+    assert f'route="/merchants/{merchant_user1.id}"' not in text
+
@@ -1,4 +1,5 @@
 from httpx import AsyncClient
+from sqlmodel import select
 from walletapi import models
 import pytest
 
@@ -43,3 +44,46 @@ async def test_merchants(client: AsyncClient, merchant_user1: models.DBMerchant)
 
     assert check_merchant["id"] == merchant_user1.id
     assert check_merchant["name"] == merchant_user1.name
+
+
+@pytest.mark.asyncio
+async def test_striped_merchant_balance(
+    client: AsyncClient, token_user1: models.Token, session: models.AsyncSession
+):
+    headers = {"Authorization": f"{token_user1.token_type} {token_user1.access_token}"}
+    response = await client.post(
+        "/merchants", json={"name": "striped"}, headers=headers
+    )
+    merchant_id = response.json()["id"]
+
+    response = await client.put(
+        f"/merchants/{merchant_id}/balance_stripes", params={"stripes": 4}, headers=headers
+    )
+    assert response.status_code == 200
+
+    item = models.DBItem(
+        name="striped", price=2, merchant_id=merchant_id, user_id=token_user1.user_id
+    )
+    wallets = [models.DBWallet(name=f"striped{i}", balance=10) for i in range(5)]
+    session.add(item)
+    session.add_all(wallets)
+    await session.commit()
+
+    for wallet in wallets:
+        response = await client.post(
+            "/buy_item", params={"item_id": item.id, "wallet_id": wallet.id}, headers=headers
+        )
+        assert response.status_code == 200
+
+    response = await client.get(f"/merchants/{merchant_id}")
+    assert response.json()["balance"] == 10
+
+    response = await client.post(f"/merchants/{merchant_id}/fold", headers=headers)
+    assert response.json()["balance"] == 10
+
+    stripes = await session.exec(
+        select(models.DBMerchantBalanceStripe.balance).where(
+            models.DBMerchantBalanceStripe.merchant_id == merchant_id
+        )
+    )
+    assert stripes.all() == [0, 0, 0, 0]
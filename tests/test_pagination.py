@@ -0,0 +1,88 @@
+from httpx import AsyncClient
+from walletapi import counting, models
+import pytest
+
+
+async def collect_pages(client: AsyncClient, url: str, key: str) -> list[dict]:
+    rows = []
+    response = await client.get(url, params={"size": 2})
+    while True:
+        data = response.json()
+        assert response.status_code == 200
+        assert len(data[key]) <= 2
+        rows.extend(data[key])
+        if not data["next_cursor"]:
+            return rows
+        response = await client.get(url, params={"size": 2, "after": data["next_cursor"]})
+        assert response.json()["page_count"] is None
+
+
+@pytest.mark.asyncio
+async def test_items_cursor_pagination(
+    client: AsyncClient, session: models.AsyncSession, merchant_user1: models.DBMerchant
+):
+    session.add_all(
+        models.DBItem(
+            name=f"page{i}", merchant_id=merchant_user1.id, user_id=merchant_user1.user_id
+        )
+        for i in range(5)
+    )
+    await session.commit()
+
+    items = await collect_pages(client, "/items", "items")
+    ids = [item["id"] for item in items]
+    assert ids == sorted(set(ids))
+
+    response = await client.get("/items", params={"page": 1, "size": 1000})
+    data = response.json()
+    assert [item["id"] for item in data["items"]] == ids
+    assert data["page_count"] == 1
+
+
+@pytest.mark.asyncio
+async def test_merchants_cursor_pagination(
+    client: AsyncClient, merchant_user1: models.DBMerchant
+):
+    merchants = await collect_pages(client, "/merchants", "merchants")
+    ids = [merchant["id"] for merchant in merchants]
+    assert ids == sorted(set(ids))
+    assert merchant_user1.id in ids
+
+
+@pytest.mark.asyncio
+async def test_transactions_cursor_pagination(client: AsyncClient):
+    transactions = await collect_pages(client, "/transactions", "transactions")
+    ids = [transaction["id"] for transaction in transactions]
+    assert len(ids) == len(set(ids))
+
+    response = await client.get("/transactions", params={"page": 1, "size": 1000})
+    assert [t["id"] for t in response.json()["transactions"]] == ids
+
+
+@pytest.mark.asyncio
+async def test_invalid_cursor(client: AsyncClient):
+    response = await client.get("/items", params={"after": "not-a-cursor"})
+    assert response.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_page_count_follows_inserts_without_recount(
+    client: AsyncClient,
+    session: models.AsyncSession,
+    merchant_user1: models.DBMerchant,
+    mocker,
+):
+    response = await client.get("/items", params={"size": 1, "exact_count": True})
+    count = response.json()["page_count"]
+
+    session.add(
+        models.DBItem(
+            name="counted", merchant_id=merchant_user1.id, user_id=merchant_user1.user_id
+        )
+    )
+    await session.commit()
+
+    exact_count = mocker.spy(counting, "exact_count")
+    response = await client.get("/items", params={"size": 1})
+    assert response.json()["page_count"] == count + 1
+    assert exact_count.call_count == 0
@@ -0,0 +1,56 @@
+import logging
+
+from httpx import AsyncClient
+from walletapi import models, query_detector
+import pytest
+
+from test_buy_item import create_item_and_wallet
+
+
+@pytest.mark.asyncio
+async def test_buy_item_query_budget(
+    client: AsyncClient,
+    token_user1: models.Token,
+    session: models.AsyncSession,
+    merchant_user1: models.DBMerchant,
+):
+    headers = {"Authorization": f"{token_user1.token_type} {token_user1.access_token}"}
+    item, wallet = await create_item_and_wallet(session, merchant_user1, 1, 10)
+    params = {"item_id": item.id, "wallet_id": wallet.id}
+    await client.post("/buy_item", params=params, headers=headers)
+
+    # BEGIN IMMEDIATE, debit, merchant credit, transaction insert
+    with query_detector.expect_queries(4) as tracker:
+        response = await client.post("/buy_item", params=params, headers=headers)
+    assert response.status_code == 200
+    assert tracker.handler == "walletapi.routers.buy_item.buy_item"
+
+
+@pytest.mark.asyncio
+async def test_list_query_budget(client: AsyncClient, merchant_user1: models.DBMerchant):
+    await client.get("/items", params={"size": 5})
+
+    # the page; the count comes from the count cache
+    with query_detector.expect_queries(1):
+        response = await client.get("/items", params={"size": 5})
+    assert response.status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_query_budget_exceeded(client: AsyncClient):
+    with pytest.raises(query_detector.QueryBudgetExceeded, match="read_items"):
+        with query_detector.expect_queries(0):
+            await client.get("/items", params={"size": 5, "exact_count": True})
+
+
+@pytest.mark.asyncio
+async def test_query_detector_logs(
+    client: AsyncClient, monkeypatch: pytest.MonkeyPatch, caplog: pytest.LogCaptureFixture
+):
+    monkeypatch.setattr(query_detector, "mode", "log")
+    monkeypatch.setattr(query_detector, "budget", 0)
+    with caplog.at_level(logging.WARNING, logger="walletapi.query_detector"):
+        response = await client.get("/items", params={"size": 5, "exact_count": True})
+    assert response.status_code == 200
+    assert "walletapi.routers.items.read_items ran" in caplog.text
+    assert "SELECT" in caplog.text
@@ -0,0 +1,111 @@
+import contextlib
+
+from httpx import AsyncClient
+from sqlalchemy import event
+from walletapi import entity_cache, models
+import pytest
+
+from test_buy_item import create_item_and_wallet
+
+
+@contextlib.contextmanager
+def record_statements():
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if not executemany and statement.lstrip().upper().startswith(("SELECT", "UPDATE", "DELETE")):
+            statements.append((statement, parameters))
+
+    engine = models.engine.sync_engine
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+
+async def full_scans(statements) -> list[tuple[str, str]]:
+    scans = []
+    async with models.engine.connect() as conn:
+        for statement, parameters in statements:
+            result = await conn.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters)
+            for row in result:
+                detail = row[-1]
+                # "SCAN t USING INDEX ..." walks an index; bare "SCAN t" reads the table
+                if detail.startswith("SCAN ") and "USING" not in detail and "CONSTANT ROW" not in detail:
+                    scans.append((detail.split()[1], statement))
+    return scans
+
+
+async def assert_indexed(statements, allowed: set[str] = frozenset()):
+    assert statements
+    scans = [scan for scan in await full_scans(statements) if scan[0] not in allowed]
+    assert not scans, scans
+
+
+@pytest.mark.asyncio
+async def test_login_plans(client: AsyncClient, user1: models.DBUser):
+    for username in (user1.username, user1.email):
+        with record_statements() as statements:
+            response = await client.post(
+                "/token", data={"username": username, "password": "123456"}
+            )
+        assert response.status_code == 200
+        await assert_indexed(statements)
+
+
+@pytest.mark.asyncio
+async def test_create_user_plans(client: AsyncClient, user1: models.DBUser):
+    payload = {
+        "email": "other@test.com",
+        "username": user1.username,
+        "first_name": "Firstname",
+        "last_name": "Lastname",
+        "password": "password",
+    }
+    with record_statements() as statements:
+        response = await client.post("/users/create", json=payload)
+    assert response.status_code == 409
+    await assert_indexed(statements)
+
+
+@pytest.mark.asyncio
+async def test_purchase_and_wallet_plans(
+    client: AsyncClient,
+    token_user1: models.Token,
+    session: models.AsyncSession,
+    merchant_user1: models.DBMerchant,
+):
+    headers = {"Authorization": f"{token_user1.token_type} {token_user1.access_token}"}
+    item, wallet = await create_item_and_wallet(session, merchant_user1, 1, 10)
+    entity_cache.items.clear()
+
+    with record_statements() as statements:
+        response = await client.post(
+            "/buy_item", params={"item_id": item.id, "wallet_id": wallet.id}, headers=headers
+        )
+        assert response.status_code == 200
+        response = await client.get(f"/wallets/{wallet.id}")
+        assert response.status_code == 200
+        response = await client.get(f"/wallets/{wallet.id}/transactions")
+        assert response.status_code == 200
+        response = await client.get(f"/merchants/{merchant_user1.id}")
+        assert response.status_code == 200
+    await assert_indexed(statements)
+
+    # deleting an item loads its transactions by item_id
+    item, _ = await create_item_and_wallet(session, merchant_user1, 1, 10)
+    with record_statements() as statements:
+        response = await client.delete(f"/items/{item.id}", headers=headers)
+        assert response.status_code == 200
+    await assert_indexed(statements)
+
+
+@pytest.mark.asyncio
+async def test_list_plans(client: AsyncClient, merchant_user1: models.DBMerchant):
+    # first pages walk the primary key under a LIMIT, and counts read whole tables
+    for path, table in (("/items", "items"), ("/merchants", "merchants"), ("/transactions", "transactions")):
+        with record_statements() as statements:
+            response = await client.get(path, params={"size": 5, "exact_count": True})
+            assert response.status_code == 200
+        await assert_indexed(statements, allowed={table})
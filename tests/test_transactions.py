@@ -0,0 +1,57 @@
+import csv
+import io
+import json
+
+from httpx import AsyncClient
+from walletapi import models
+import pytest
+
+
+@pytest.mark.asyncio
+async def test_export_transactions(
+    client: AsyncClient,
+    token_user1: models.Token,
+    session: models.AsyncSession,
+    merchant_user1: models.DBMerchant,
+):
+    headers = {"Authorization": f"{token_user1.token_type} {token_user1.access_token}"}
+    item = models.DBItem(
+        name="export", merchant_id=merchant_user1.id, user_id=merchant_user1.user_id
+    )
+    wallet = models.DBWallet(name="export", balance=0)
+    session.add_all([item, wallet])
+    await session.commit()
+    session.add_all(
+        models.DBTransaction(price=i, wallet_id=wallet.id, item_id=item.id)
+        for i in range(3)
+    )
+    await session.commit()
+
+    response = await client.get(
+        "/transactions/export", params={"wallet_id": wallet.id}, headers=headers
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [row["price"] for row in rows] == [0, 1, 2]
+    assert all(row["wallet_id"] == wallet.id for row in rows)
+
+    response = await client.get(
+        "/transactions/export",
+        params={"format": "csv", "wallet_id": wallet.id, "merchant_id": merchant_user1.id},
+        headers=headers,
+    )
+    assert response.status_code == 200
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert [float(row["price"]) for row in rows] == [0, 1, 2]
+
+    response = await client.get(
+        "/transactions/export", params={"merchant_id": 0}, headers=headers
+    )
+    assert response.text == ""
+
+
+@pytest.mark.asyncio
+async def test_export_requires_authentication(client: AsyncClient):
+    response = await client.get("/transactions/export")
+    assert response.status_code == 401
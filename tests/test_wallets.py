@@ -0,0 +1,82 @@
+import datetime
+
+from httpx import AsyncClient
+from walletapi import models
+import pytest
+
+
+@pytest.mark.asyncio
+async def test_wallet_transactions(
+    client: AsyncClient, session: models.AsyncSession, merchant_user1: models.DBMerchant
+):
+    item = models.DBItem(
+        name="statement", merchant_id=merchant_user1.id, user_id=merchant_user1.user_id
+    )
+    wallet = models.DBWallet(name="statement", balance=0)
+    other = models.DBWallet(name="other", balance=0)
+    session.add_all([item, wallet, other])
+    await session.commit()
+
+    start = datetime.datetime(2024, 1, 1)
+    session.add_all(
+        models.DBTransaction(
+            price=i,
+            wallet_id=wallet.id,
+            item_id=item.id,
+            transaction_date=start + datetime.timedelta(days=i),
+        )
+        for i in range(5)
+    )
+    session.add(models.DBTransaction(price=1, wallet_id=other.id, item_id=item.id))
+    await session.commit()
+
+    transactions = []
+    params = {"size": 2}
+    while True:
+        response = await client.get(f"/wallets/{wallet.id}/transactions", params=params)
+        assert response.status_code == 200
+        data = response.json()
+        transactions.extend(data["transactions"])
+        if not data["next_cursor"]:
+            break
+        params["after"] = data["next_cursor"]
+
+    assert [t["price"] for t in transactions] == [0, 1, 2, 3, 4]
+    assert all(t["wallet_id"] == wallet.id for t in transactions)
+
+    response = await client.get(
+        f"/wallets/{wallet.id}/transactions",
+        params={"start_date": "2024-01-02T00:00:00", "end_date": "2024-01-04T00:00:00"},
+    )
+    assert [t["price"] for t in response.json()["transactions"]] == [1, 2]
+
+    response = await client.get("/wallets/0/transactions")
+    assert response.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_wallet_etag(client: AsyncClient, token_user1: models.Token):
+    headers = {"Authorization": f"{token_user1.token_type} {token_user1.access_token}"}
+    response = await client.post(
+        "/wallets", json={"name": "etag", "balance": 10}, headers=headers
+    )
+    wallet_id = response.json()["id"]
+
+    response = await client.get(f"/wallets/{wallet_id}")
+    etag = response.headers["ETag"]
+    assert response.status_code == 200
+
+    response = await client.get(f"/wallets/{wallet_id}", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.headers["ETag"] == etag
+    assert response.content == b""
+
+    response = await client.put(
+        f"/wallets/{wallet_id}", json={"name": "etag", "balance": 20}, headers=headers
+    )
+    assert response.status_code == 200
+
+    response = await client.get(f"/wallets/{wallet_id}", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+    assert response.json()["balance"] == 20
@@ -0,0 +1,95 @@
+import collections
+import time
+
+
+class TTLCache:
+    # LRU cache with per-entry expiry; tags group entries that are
+    # invalidated together (e.g. every token of one user)
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 60.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.entries = collections.OrderedDict()  # key -> (expires_at, tag, value)
+        self.tags = {}
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.maxsize > 0 and self.ttl > 0
+
+    def get(self, key, default=None):
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return default
+
+        expires_at, _, value = entry
+        if expires_at <= time.monotonic():
+            self._remove(key)
+            self.misses += 1
+            return default
+
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key, value, ttl: float | None = None, tag=None):
+        if not self.enabled:
+            return
+
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        if ttl <= 0:
+            return
+
+        self._remove(key)
+        self.entries[key] = (time.monotonic() + ttl, tag, value)
+        if tag is not None:
+            self.tags.setdefault(tag, set()).add(key)
+
+        while len(self.entries) > self.maxsize:
+            self._remove(next(iter(self.entries)))
+            self.evictions += 1
+
+    def replace(self, key, value) -> bool:
+        # updates a live entry in place, keeping its expiry and LRU position
+        entry = self.entries.get(key)
+        if entry is None or entry[0] <= time.monotonic():
+            return False
+        self.entries[key] = (entry[0], entry[1], value)
+        return True
+
+    def invalidate(self, key):
+        self._remove(key)
+
+    def invalidate_tag(self, tag):
+        for key in self.tags.pop(tag, ()):
+            self.entries.pop(key, None)
+
+    def clear(self):
+        self.entries.clear()
+        self.tags.clear()
+
+    def _remove(self, key):
+        entry = self.entries.pop(key, None)
+        if entry is None or entry[1] is None:
+            return
+
+        keys = self.tags.get(entry[1])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self.tags[entry[1]]
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self.entries),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+        }
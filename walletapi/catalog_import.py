@@ -0,0 +1,163 @@
+import codecs
+import csv
+import json
+import time
+
+from pydantic import ValidationError
+from sqlmodel import insert
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from . import counting
+from .models.item import CreateItem
+from .models.dbmodels import DBItem
+
+
+IMPORT_CHUNK_SIZE = 1000
+MAX_REPORTED_ERRORS = 100
+
+ITEM_COLUMNS = ["name", "description", "price", "tax", "user_id", "merchant_id"]
+
+
+class ImportFormatError(Exception):
+    pass
+
+
+async def json_rows(chunks):
+    # Incremental parser for a top-level JSON array, so the body is never
+    # held in memory as a whole.
+    decoder = json.JSONDecoder()
+    text = codecs.getincrementaldecoder("utf-8")()
+    buffer = ""
+    started = False
+    done = False
+    eof = False
+    chunks = aiter(chunks)
+
+    while True:
+        position = 0
+        while True:
+            while position < len(buffer) and buffer[position] in " \t\r\n,":
+                if buffer[position] == "," and not started:
+                    raise ImportFormatError("Expected a JSON array")
+                position += 1
+            if position == len(buffer):
+                break
+            if not started:
+                if buffer[position] != "[":
+                    raise ImportFormatError("Expected a JSON array")
+                started = True
+                position += 1
+                continue
+            if buffer[position] == "]":
+                done = True
+                position += 1
+                break
+            try:
+                row, position = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                if eof:
+                    raise ImportFormatError("Invalid JSON")
+                break
+            yield row
+        buffer = buffer[position:]
+
+        if done:
+            if buffer.strip():
+                raise ImportFormatError("Unexpected data after the JSON array")
+            return
+        if eof:
+            raise ImportFormatError("Unterminated JSON array")
+        try:
+            buffer += text.decode(await anext(chunks))
+        except StopAsyncIteration:
+            buffer += text.decode(b"", final=True)
+            eof = True
+
+
+async def csv_rows(chunks):
+    # Yields one dict per record; a record may span lines inside quotes.
+    text = codecs.getincrementaldecoder("utf-8-sig")()
+    header = None
+    pending = ""
+    buffer = ""
+
+    async def records():
+        nonlocal buffer, pending
+        async for chunk in chunks:
+            buffer += text.decode(chunk)
+            *lines, buffer = buffer.split("\n")
+            for line in lines:
+                pending += line + "\n"
+                if pending.count('"') % 2 == 0:
+                    yield pending
+                    pending = ""
+        pending += buffer + text.decode(b"", final=True)
+        if pending.strip():
+            yield pending
+
+    async for record in records():
+        values = next(csv.reader([record.rstrip("\r\n")]), [])
+        if header is None:
+            header = values
+            continue
+        if not any(values):
+            continue
+        yield {key: value or None for key, value in zip(header, values)}
+
+
+async def insert_items(session: AsyncSession, rows: list[dict]):
+    conn = await session.connection()
+    if conn.dialect.driver == "asyncpg":
+        raw = await conn.get_raw_connection()
+        await raw.driver_connection.copy_records_to_table(
+            DBItem.__tablename__,
+            records=[tuple(row[column] for column in ITEM_COLUMNS) for row in rows],
+            columns=ITEM_COLUMNS,
+        )
+    else:
+        await session.exec(insert(DBItem), params=rows)
+
+
+async def import_items(session: AsyncSession, merchant_id: int, rows) -> dict:
+    started = time.perf_counter()
+    imported = 0
+    failed = 0
+    errors = []
+    chunk = []
+
+    async def flush():
+        nonlocal imported
+        await insert_items(session, chunk)
+        await session.commit()
+        counting.adjust(DBItem.__tablename__, len(chunk))
+        imported += len(chunk)
+        chunk.clear()
+
+    row_number = 0
+    async for row in rows:
+        row_number += 1
+        try:
+            item = CreateItem.model_validate(row)
+        except ValidationError as e:
+            failed += 1
+            if len(errors) < MAX_REPORTED_ERRORS:
+                errors.append(
+                    {"row": row_number, "errors": e.errors(include_url=False, include_input=False)}
+                )
+            continue
+
+        chunk.append(dict(item.model_dump(), merchant_id=merchant_id))
+        if len(chunk) >= IMPORT_CHUNK_SIZE:
+            await flush()
+
+    if chunk:
+        await flush()
+
+    elapsed = time.perf_counter() - started
+    return {
+        "imported": imported,
+        "failed": failed,
+        "errors": errors,
+        "elapsed_seconds": elapsed,
+        "rows_per_second": imported / elapsed if elapsed else 0.0,
+    }
@@ -0,0 +1,44 @@
+import argparse
+import os
+
+import uvicorn
+
+
+def serve(args):
+    # Each worker process calls create_app itself, and its lifespan builds
+    # the engine and caches. On SIGTERM uvicorn stops accepting, waits up to
+    # the graceful timeout for in-flight requests, then runs the shutdown.
+    uvicorn.run(
+        "walletapi.main:create_app",
+        factory=True,
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        timeout_graceful_shutdown=args.graceful_timeout,
+        proxy_headers=args.proxy_headers,
+        log_level=args.log_level,
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="walletapi")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    parser_serve = commands.add_parser("serve", help="run the API in worker processes")
+    parser_serve.add_argument("--host", default="127.0.0.1")
+    parser_serve.add_argument("--port", type=int, default=8000)
+    parser_serve.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser_serve.add_argument(
+        "--graceful-timeout", type=float, default=30.0,
+        help="seconds to wait for in-flight requests on shutdown",
+    )
+    parser_serve.add_argument("--proxy-headers", action="store_true")
+    parser_serve.add_argument("--log-level", default="info")
+    parser_serve.set_defaults(func=serve)
+
+    args = parser.parse_args(argv)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,4 @@
-from dotenv import load_dotenv
-load_dotenv()
+from typing import Literal
 
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
@@ -11,10 +10,88 @@ class Settings(BaseSettings):
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 5 * 60  # 5 minutes
     REFRESH_TOKEN_EXPIRE_MINUTES: int = 7 * 24 * 60  # 7 days
 
+    # "pooled" keeps a bounded connection pool, "null" opens a new connection
+    # per session (used by the tests)
+    SQLDB_ENGINE_MODE: Literal["pooled", "null"] = "pooled"
+    SQLDB_ECHO: bool = False
+    SQLDB_POOL_SIZE: int = 10
+    SQLDB_MAX_OVERFLOW: int = 20
+    SQLDB_POOL_TIMEOUT: float = 30.0  # seconds
+    SQLDB_POOL_RECYCLE: int = 30 * 60  # 30 minutes
+    SQLDB_POOL_PRE_PING: bool = True
+    SQLDB_STATEMENT_CACHE_SIZE: int = 500  # asyncpg prepared statements
+    # read-only routes go round-robin over these, e.g.
+    # SQLDB_REPLICA_URLS='["postgresql+asyncpg://replica1/wallet"]'
+    SQLDB_REPLICA_URLS: list[str] = []
+    SQLDB_READ_AFTER_WRITE_SECONDS: float = 5.0
+    SQLDB_SQLITE_BUSY_TIMEOUT: float = 30.0  # seconds to wait for a SQLite lock
+
+    # bcrypt runs in a bounded worker pool so it never blocks the event loop
+    HASHING_EXECUTOR: Literal["thread", "process"] = "thread"
+    HASHING_WORKERS: int = 4
+    HASHING_QUEUE_LIMIT: int = 64
+
+    # used refresh tokens; kept in memory, saved here so restarts keep them
+    TOKEN_REVOCATION_FILE: str | None = None
+    TOKEN_REVOCATION_SAVE_INTERVAL: float = 10.0  # seconds
+
+    # /token attempts per minute and burst, per username and per client IP;
+    # a rate of 0 turns that limiter off
+    LOGIN_USERNAME_RATE: float = 10.0
+    LOGIN_USERNAME_BURST: int = 5
+    LOGIN_IP_RATE: float = 60.0
+    LOGIN_IP_BURST: int = 30
+    LOGIN_THROTTLE_KEYS: int = 100_000
+
+    PRINCIPAL_CACHE_SIZE: int = 10_000  # 0 disables the cache
+    PRINCIPAL_CACHE_TTL: int = 60  # seconds, never longer than the token exp
+
+    # items and merchant identities read by purchases, read_item and read_merchant
+    ENTITY_CACHE_ENABLED: bool = True
+    ENTITY_CACHE_SIZE: int = 10_000
+    ENTITY_CACHE_TTL: int = 300  # seconds, bounds staleness across workers
+
+    PAGE_SIZE: int = 50
+    PAGE_SIZE_MAX: int = 500
+
+    # page_count source: "cached" (exact, refreshed every COUNT_CACHE_TTL),
+    # "approximate" (PostgreSQL planner statistics) or "exact" (COUNT(*))
+    COUNT_MODE: Literal["cached", "approximate", "exact"] = "cached"
+    COUNT_CACHE_TTL: float = 5.0  # seconds
+
+    # JSON lines on stdout; LOG_LEVELS overrides single loggers, e.g.
+    # LOG_LEVELS='{"walletapi.query_detector": "DEBUG"}'
+    LOG_LEVEL: str = "INFO"
+    LOG_LEVELS: dict[str, str] = {}
+
+    METRICS_ENABLED: bool = True  # request middleware; /metrics is always served
+
+    # per-request statement budget and slow statement threshold, for
+    # development and canaries: "log" warns, "raise" fails the request
+    QUERY_DETECTOR: Literal["off", "log", "raise"] = "off"
+    QUERY_BUDGET: int = 20
+    SLOW_QUERY_SECONDS: float = 0.5
+
+    MERCHANT_BALANCE_FOLD_INTERVAL: float = 60.0  # seconds, 0 disables the task
+    # last_login_date is written in batches; 0 leaves it all to shutdown
+    LAST_LOGIN_FLUSH_INTERVAL: float = 5.0  # seconds
+
     model_config = SettingsConfigDict(
         env_file=".env", validate_assignment=True, extra="allow"
     )
 
 
-def get_settings():
-    return Settings()
\ No newline at end of file
+# Built once per process and shared; create_app installs the instance it was
+# given so tests and workers never re-read .env behind its back.
+settings: Settings | None = None
+
+
+def init_settings(value: Settings):
+    global settings
+    settings = value
+
+
+def get_settings() -> Settings:
+    if settings is None:
+        init_settings(Settings())
+    return settings
@@ -0,0 +1,86 @@
+from sqlalchemy import event, text
+from sqlalchemy.orm import Session
+from sqlmodel import select, func
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from . import cache
+
+
+mode = "cached"
+counts = cache.TTLCache(maxsize=64, ttl=5)
+
+
+def init_counting(settings):
+    global mode, counts
+    mode = settings.COUNT_MODE
+    counts = cache.TTLCache(maxsize=64, ttl=settings.COUNT_CACHE_TTL)
+
+
+def adjust(table: str, delta: int):
+    value = counts.get(table)
+    if value is not None:
+        counts.replace(table, max(value + delta, 0))
+
+
+async def exact_count(session: AsyncSession, model) -> int:
+    count = (await session.exec(select(func.count()).select_from(model))).one()
+    counts.set(model.__tablename__, count)
+    return count
+
+
+async def approximate_count(session: AsyncSession, model) -> int | None:
+    conn = await session.connection()
+    if conn.dialect.name != "postgresql":
+        return None
+
+    result = await session.exec(
+        text("SELECT reltuples::bigint FROM pg_class WHERE relname = :table").bindparams(
+            table=model.__tablename__
+        )
+    )
+    estimate = result.scalar_one_or_none()
+    # -1 means the table was never analyzed
+    if estimate is None or estimate < 0:
+        return None
+    return estimate
+
+
+async def count(session: AsyncSession, model, exact: bool = False) -> int:
+    if exact or mode == "exact":
+        return await exact_count(session, model)
+
+    if mode == "approximate":
+        estimate = await approximate_count(session, model)
+        if estimate is not None:
+            return estimate
+
+    value = counts.get(model.__tablename__)
+    if value is not None:
+        return value
+    return await exact_count(session, model)
+
+
+# ORM inserts and deletes keep the cached counts current between refreshes;
+# bulk Core statements call adjust() themselves.
+@event.listens_for(Session, "after_flush")
+def collect_deltas(session, flush_context):
+    deltas = session.info.setdefault("count_deltas", {})
+    for obj in session.new:
+        table = getattr(obj, "__tablename__", None)
+        if table:
+            deltas[table] = deltas.get(table, 0) + 1
+    for obj in session.deleted:
+        table = getattr(obj, "__tablename__", None)
+        if table:
+            deltas[table] = deltas.get(table, 0) - 1
+
+
+@event.listens_for(Session, "after_commit")
+def apply_deltas(session):
+    for table, delta in session.info.pop("count_deltas", {}).items():
+        adjust(table, delta)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def discard_deltas(session, previous_transaction):
+    session.info.pop("count_deltas", None)
@@ -1,47 +1,75 @@
-from fastapi import Depends, HTTPException, status, logger
+from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 
+import logging
+import time
 import typing
 import jwt
 
 from pydantic import ValidationError
 
+from . import cache
 from . import models
 from . import security
 from . import config
 
 
+logger = logging.getLogger(__name__)
+
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/token")
 
-settings = config.get_settings()
+# A cached principal can outlive a change made elsewhere (another worker, a
+# direct DB edit) by at most PRINCIPAL_CACHE_TTL; in-process user mutations
+# call invalidate_user.
+principal_cache = cache.TTLCache()
+
+
+def init_principal_cache(settings):
+    global principal_cache
+    principal_cache = cache.TTLCache(
+        maxsize=settings.PRINCIPAL_CACHE_SIZE, ttl=settings.PRINCIPAL_CACHE_TTL
+    )
+
+
+def invalidate_user(user_id: int):
+    principal_cache.invalidate_tag(int(user_id))
 
 
 async def get_current_user(
     token: typing.Annotated[str, Depends(oauth2_scheme)],
-    session: typing.Annotated[models.AsyncSession, Depends(models.get_session)],
+    session: typing.Annotated[models.AsyncSession, Depends(models.get_read_session)],
 ) -> models.User:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
+    user = principal_cache.get(token)
+    if user is not None:
+        return user
+
     try:
         payload = jwt.decode(
-            token, settings.SECRET_KEY, algorithms=[security.ALGORITHM]
+            token, config.get_settings().SECRET_KEY, algorithms=[security.ALGORITHM]
         )
         user_id: int = payload.get("sub")
 
-        if user_id is None:
+        # refresh tokens are only good at /token/refresh
+        if user_id is None or payload.get("type") == "refresh":
             raise credentials_exception
 
-    except jwt.JWTError as e:
-        print(e)
+    except jwt.InvalidTokenError as e:
+        logger.info("invalid token", extra={"error": str(e)})
         raise credentials_exception
 
-    user = await session.get(models.DBUser, user_id)
-    if user is None:
+    db_user = await session.get(models.DBUser, user_id)
+    if db_user is None:
         raise credentials_exception
 
+    user = models.User.model_validate(db_user)
+    expires_in = payload["exp"] - time.time() if "exp" in payload else None
+    principal_cache.set(token, user, ttl=expires_in, tag=user.id)
+
     return user
 
 
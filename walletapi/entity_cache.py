@@ -0,0 +1,97 @@
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from . import cache
+from .models.dbmodels import DBItem, DBMerchant
+
+
+# Items and merchants change rarely but are read on every purchase. Entries
+# are dropped explicitly by the write routes of this process; changes made
+# by other workers show up after ENTITY_CACHE_TTL. Balances are never cached.
+items = cache.TTLCache()
+merchants = cache.TTLCache()
+
+ITEM_COLUMNS = (
+    DBItem.id,
+    DBItem.name,
+    DBItem.description,
+    DBItem.price,
+    DBItem.tax,
+    DBItem.user_id,
+    DBItem.merchant_id,
+    DBItem.version,
+    DBMerchant.name.label("merchant_name"),
+    DBMerchant.balance_stripes,
+)
+
+MERCHANT_COLUMNS = (
+    DBMerchant.id,
+    DBMerchant.name,
+    DBMerchant.user_id,
+    DBMerchant.balance_stripes,
+    DBMerchant.version,
+)
+
+
+def init_entity_cache(settings):
+    global items, merchants
+    size = settings.ENTITY_CACHE_SIZE if settings.ENTITY_CACHE_ENABLED else 0
+    items = cache.TTLCache(maxsize=size, ttl=settings.ENTITY_CACHE_TTL)
+    merchants = cache.TTLCache(maxsize=size, ttl=settings.ENTITY_CACHE_TTL)
+
+
+async def get_items(session: AsyncSession, item_ids) -> dict[int, dict]:
+    found = {}
+    missing = []
+    for item_id in item_ids:
+        item = items.get(item_id)
+        if item is None:
+            missing.append(item_id)
+        else:
+            found[item_id] = item
+
+    if missing:
+        result = await session.exec(
+            select(*ITEM_COLUMNS)
+            .outerjoin(DBMerchant, DBItem.merchant_id == DBMerchant.id)
+            .where(DBItem.id.in_(missing))
+        )
+        for row in result.all():
+            item = row._asdict()
+            # tagged by merchant so a merchant change drops its items too
+            items.set(item["id"], item, tag=item["merchant_id"])
+            found[item["id"]] = item
+    return found
+
+
+async def get_item(session: AsyncSession, item_id: int) -> dict | None:
+    return (await get_items(session, [item_id])).get(item_id)
+
+
+async def get_merchant(session: AsyncSession, merchant_id: int) -> dict | None:
+    merchant = merchants.get(merchant_id)
+    if merchant is not None:
+        return merchant
+
+    result = await session.exec(
+        select(*MERCHANT_COLUMNS).where(DBMerchant.id == merchant_id)
+    )
+    row = result.one_or_none()
+    if row is None:
+        return None
+    merchant = row._asdict()
+    merchants.set(merchant_id, merchant)
+    return merchant
+
+
+def invalidate_item(item_id: int):
+    items.invalidate(item_id)
+
+
+def invalidate_merchant(merchant_id: int):
+    merchants.invalidate(merchant_id)
+    items.invalidate_tag(merchant_id)
+
+
+def stats() -> dict:
+    return {"items": items.stats(), "merchants": merchants.stats()}
@@ -0,0 +1,46 @@
+import csv
+import datetime
+import io
+import json
+
+from . import models
+
+
+EXPORT_CHUNK_SIZE = 1000
+
+
+def format_value(value):
+    if isinstance(value, datetime.datetime):
+        return value.isoformat()
+    return value
+
+
+def ndjson_chunk(columns: list[str], rows) -> str:
+    return "".join(
+        json.dumps(dict(zip(columns, map(format_value, row))), separators=(",", ":")) + "\n"
+        for row in rows
+    )
+
+
+def csv_chunk(rows) -> str:
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows([map(format_value, row) for row in rows])
+    return buffer.getvalue()
+
+
+async def stream_rows(query, columns: list[str], format: str):
+    # The request's session is closed before the body is sent, so the export
+    # owns its session. stream() keeps a server-side cursor open and only
+    # EXPORT_CHUNK_SIZE rows are held in memory at a time.
+    if format == "csv":
+        yield csv_chunk([columns])
+
+    async with models.session_factory() as session:
+        result = await session.stream(
+            query.execution_options(yield_per=EXPORT_CHUNK_SIZE)
+        )
+        async for rows in result.partitions():
+            if format == "csv":
+                yield csv_chunk(rows)
+            else:
+                yield ndjson_chunk(columns, rows)
@@ -0,0 +1,125 @@
+import asyncio
+import concurrent.futures
+import time
+
+import bcrypt
+
+
+class HashingBusyError(Exception):
+    pass
+
+
+def hash_password(plain_password: str) -> str:
+    return bcrypt.hashpw(
+        plain_password.encode("utf-8"), salt=bcrypt.gensalt()
+    ).decode("utf-8")
+
+
+def check_password(plain_password: str, hashed_password: str) -> bool:
+    return bcrypt.checkpw(
+        plain_password.encode("utf-8"), hashed_password.encode("utf-8")
+    )
+
+
+def _timed(func, *args):
+    started = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - started
+
+
+class HashingService:
+    def __init__(self, workers: int = 4, queue_limit: int = 64, executor: str = "thread"):
+        self.workers = workers
+        self.queue_limit = queue_limit
+        self.executor_type = executor
+        self.executor = None
+
+        self.pending = 0
+        self.completed = 0
+        self.rejected = 0
+        self.wait_seconds = 0.0
+        self.run_seconds = 0.0
+        self.max_latency_seconds = 0.0
+
+    def get_executor(self) -> concurrent.futures.Executor:
+        if self.executor is None:
+            if self.executor_type == "process":
+                self.executor = concurrent.futures.ProcessPoolExecutor(self.workers)
+            else:
+                self.executor = concurrent.futures.ThreadPoolExecutor(
+                    self.workers, thread_name_prefix="walletapi-hashing"
+                )
+        return self.executor
+
+    async def run(self, func, *args):
+        if self.pending >= self.workers + self.queue_limit:
+            self.rejected += 1
+            raise HashingBusyError("Password hashing queue is full, try again later")
+
+        self.pending += 1
+        submitted = time.perf_counter()
+        try:
+            loop = asyncio.get_running_loop()
+            result, run_seconds = await loop.run_in_executor(
+                self.get_executor(), _timed, func, *args
+            )
+        finally:
+            self.pending -= 1
+
+        latency = time.perf_counter() - submitted
+        self.completed += 1
+        self.run_seconds += run_seconds
+        self.wait_seconds += max(latency - run_seconds, 0.0)
+        self.max_latency_seconds = max(self.max_latency_seconds, latency)
+        return result
+
+    async def hash_password(self, plain_password: str) -> str:
+        return await self.run(hash_password, plain_password)
+
+    async def verify_password(self, plain_password: str, hashed_password: str) -> bool:
+        return await self.run(check_password, plain_password, hashed_password)
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "queue_limit": self.queue_limit,
+            "in_flight": self.pending,
+            "queue_depth": max(self.pending - self.workers, 0),
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "wait_seconds_total": self.wait_seconds,
+            "run_seconds_total": self.run_seconds,
+            "max_latency_seconds": self.max_latency_seconds,
+        }
+
+    def shutdown(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+
+
+service = None
+
+
+def init_hashing(settings):
+    global service
+    if service is not None:
+        service.shutdown()
+
+    service = HashingService(
+        workers=settings.HASHING_WORKERS,
+        queue_limit=settings.HASHING_QUEUE_LIMIT,
+        executor=settings.HASHING_EXECUTOR,
+    )
+
+
+def get_service() -> HashingService:
+    global service
+    if service is None:
+        service = HashingService()
+    return service
+
+
+def shutdown():
+    if service is not None:
+        service.shutdown()
@@ -0,0 +1,38 @@
+import datetime
+import logging
+
+from sqlmodel import update
+
+from . import models
+from .models.dbmodels import DBUser
+
+
+logger = logging.getLogger(__name__)
+
+# user id -> latest login time not yet written; /token only records here and
+# a lifespan task writes the batch, so logins never wait on the users row
+pending: dict[int, datetime.datetime] = {}
+
+
+def record(user_id: int, when: datetime.datetime):
+    pending[user_id] = when
+
+
+async def flush() -> int:
+    global pending
+    if not pending:
+        return 0
+
+    batch, pending = pending, {}
+    rows = [{"id": user_id, "last_login_date": when} for user_id, when in batch.items()]
+    try:
+        async with models.session_factory() as session:
+            # one executemany UPDATE ... WHERE id = ? for the whole batch
+            await session.exec(update(DBUser), params=rows)
+            await session.commit()
+    except Exception:
+        # keep the batch for the next flush unless a newer login replaced it
+        for user_id, when in batch.items():
+            pending.setdefault(user_id, when)
+        raise
+    return len(rows)
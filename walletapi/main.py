@@ -1,31 +1,114 @@
-from gevent import monkey
-
-monkey.patch_all()
-
-from fastapi import FastAPI
+from fastapi import FastAPI, Request, status
+from fastapi.responses import JSONResponse, ORJSONResponse
 from contextlib import asynccontextmanager
 
+import asyncio
+import logging
+
 from . import config
+from . import counting
+from . import deps
+from . import entity_cache
+from . import hashing
+from . import last_login
+from . import logs
+from . import merchant_balance
+from . import metrics
 from . import models
+from . import query_detector
+from . import revocation
+from . import throttle
 
 from . import routers
 
 
+logger = logging.getLogger(__name__)
+
+
+async def run_periodically(interval: float, job, name: str):
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await job()
+        except Exception:
+            logger.exception("%s failed", name)
+
+
+async def fold_merchant_balances():
+    async with models.session_factory() as session:
+        await merchant_balance.fold_all(session)
+
+
+def init_components(settings):
+    # Engines, caches, executors and the log writer belong to one process.
+    # lifespan calls this in each worker once it has started, so nothing
+    # built in a parent process is shared across a fork.
+    logs.init_logging(settings)
+    models.init_db(settings)
+    hashing.init_hashing(settings)
+    deps.init_principal_cache(settings)
+    counting.init_counting(settings)
+    query_detector.init_query_detector(settings)
+    entity_cache.init_entity_cache(settings)
+    revocation.init_revocation(settings)
+    throttle.init_throttle(settings)
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    settings = app.state.settings
+    init_components(settings)
+    jobs = [
+        (settings.MERCHANT_BALANCE_FOLD_INTERVAL, fold_merchant_balances, "merchant balance fold"),
+        (settings.LAST_LOGIN_FLUSH_INTERVAL, last_login.flush, "last login flush"),
+        (settings.TOKEN_REVOCATION_SAVE_INTERVAL, revocation.save, "revocation list save"),
+    ]
+    tasks = [
+        asyncio.create_task(run_periodically(interval, job, name))
+        for interval, job, name in jobs
+        if interval > 0
+    ]
+
     yield
+
+    # the server has stopped accepting and drained in-flight requests
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    for job, name in ((last_login.flush, "last login flush"), (revocation.save, "revocation list save")):
+        try:
+            await job()
+        except Exception:
+            logger.exception("%s failed", name)
+    hashing.shutdown()
+    logs.shutdown()
     if models.engine is not None:
         # Close the DB connection
         await models.close_session()
 
 
+async def hashing_busy_handler(request: Request, exc: hashing.HashingBusyError):
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": str(exc)},
+        headers={"Retry-After": "1"},
+    )
+
+
 def create_app(settings=None):
-    if not settings:
+    if settings:
+        config.init_settings(settings)
+    else:
         settings = config.get_settings()
 
-    app = FastAPI(lifespan=lifespan)
-
-    models.init_db(settings)
+    app = FastAPI(lifespan=lifespan, default_response_class=ORJSONResponse)
+    app.state.settings = settings
+    app.add_exception_handler(hashing.HashingBusyError, hashing_busy_handler)
+    if settings.QUERY_DETECTOR != "off":
+        app.add_middleware(query_detector.QueryDetectorMiddleware)
+    if settings.METRICS_ENABLED:
+        app.add_middleware(metrics.MetricsMiddleware)
+    app.add_middleware(logs.RequestIdMiddleware)
 
     routers.init_routers(app)
     return app
\ No newline at end of file
@@ -0,0 +1,206 @@
+import bisect
+import contextvars
+import time
+
+from sqlalchemy import event
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool
+
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class Family:
+    # one metric name, one child per label set
+    def __init__(self, name: str, kind: str, help: str, labels=(), buckets=None):
+        self.name = name
+        self.kind = kind
+        self.help = help
+        self.label_names = labels
+        self.buckets = buckets
+        self.children = {}
+
+    def labels(self, *values):
+        child = self.children.get(values)
+        if child is None:
+            child = self.children[values] = Histogram(self.buckets) if self.buckets else [0.0]
+        return child
+
+    def inc(self, *values, amount: float = 1.0):
+        self.labels(*values)[0] += amount
+
+    def set(self, *values, value: float):
+        self.labels(*values)[0] = value
+
+
+class RequestStats:
+    __slots__ = ("queries", "db_seconds")
+
+    def __init__(self):
+        self.queries = 0
+        self.db_seconds = 0.0
+
+
+# set by the middleware; engine events running inside the request add to it
+current_request = contextvars.ContextVar("current_request", default=None)
+
+ROUTE_LABELS = ("method", "route")
+
+requests_total = Family(
+    "walletapi_http_requests_total", "counter", "HTTP requests by route and status",
+    labels=ROUTE_LABELS + ("status",),
+)
+request_duration = Family(
+    "walletapi_http_request_duration_seconds", "histogram", "HTTP request latency",
+    labels=ROUTE_LABELS, buckets=LATENCY_BUCKETS,
+)
+requests_in_flight = Family(
+    "walletapi_http_requests_in_flight", "gauge", "HTTP requests being served"
+)
+request_queries = Family(
+    "walletapi_http_request_db_queries", "histogram", "Database queries per request",
+    labels=ROUTE_LABELS, buckets=QUERY_BUCKETS,
+)
+request_db_duration = Family(
+    "walletapi_http_request_db_seconds", "histogram", "Database time per request",
+    labels=ROUTE_LABELS, buckets=LATENCY_BUCKETS,
+)
+db_queries_total = Family(
+    "walletapi_db_queries_total", "counter", "Database statements executed"
+)
+pool_wait = Family(
+    "walletapi_db_pool_checkout_wait_seconds", "histogram", "Time spent waiting for a connection",
+    buckets=LATENCY_BUCKETS,
+)
+
+FAMILIES = [
+    requests_total,
+    request_duration,
+    requests_in_flight,
+    request_queries,
+    request_db_duration,
+    db_queries_total,
+    pool_wait,
+]
+
+
+def route_label(scope) -> str:
+    # the route template keeps label cardinality bounded
+    route = scope.get("route")
+    return getattr(route, "path", "unmatched")
+
+
+class MetricsMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        stats = RequestStats()
+        token = current_request.set(stats)
+        requests_in_flight.inc(amount=1)
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            requests_in_flight.inc(amount=-1)
+            current_request.reset(token)
+
+            method, route = scope["method"], route_label(scope)
+            requests_total.inc(method, route, str(status_code))
+            request_duration.labels(method, route).observe(elapsed)
+            request_queries.labels(method, route).observe(stats.queries)
+            request_db_duration.labels(method, route).observe(stats.db_seconds)
+
+
+def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_started"].pop()
+    db_queries_total.inc()
+    stats = current_request.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.db_seconds += elapsed
+
+
+def instrument_engine(engine):
+    sync_engine = engine.sync_engine
+    if not event.contains(sync_engine, "before_cursor_execute", before_cursor_execute):
+        event.listen(sync_engine, "before_cursor_execute", before_cursor_execute)
+        event.listen(sync_engine, "after_cursor_execute", after_cursor_execute)
+
+
+class TimedPoolMixin:
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            pool_wait.labels().observe(time.perf_counter() - started)
+
+
+class TimedQueuePool(TimedPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+class TimedNullPool(TimedPoolMixin, NullPool):
+    pass
+
+
+def format_labels(names, values) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{value}"' for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+
+def render_family(family: Family) -> list[str]:
+    label_names = family.label_names
+    lines = [f"# HELP {family.name} {family.help}", f"# TYPE {family.name} {family.kind}"]
+    for values, child in sorted(family.children.items()):
+        labels = format_labels(label_names, values)
+        if isinstance(child, Histogram):
+            cumulative = 0
+            for bound, count in zip(family.buckets + ("+Inf",), child.counts):
+                cumulative += count
+                bucket_labels = format_labels(label_names + ("le",), values + (bound,))
+                lines.append(f"{family.name}_bucket{bucket_labels} {cumulative}")
+            lines.append(f"{family.name}_sum{labels} {child.sum}")
+            lines.append(f"{family.name}_count{labels} {child.count}")
+        else:
+            lines.append(f"{family.name}{labels} {child[0]}")
+    return lines
+
+
+def render(extra=()) -> str:
+    lines = []
+    for family in FAMILIES + list(extra):
+        lines += render_family(family)
+    return "\n".join(lines) + "\n"
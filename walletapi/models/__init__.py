@@ -1,35 +1,88 @@
+import itertools
+
+from fastapi import Depends, Request
+from sqlalchemy import event
 from sqlmodel import SQLModel
 from sqlmodel.ext.asyncio.session import AsyncSession
-from sqlalchemy.pool import NullPool
 
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.asyncio import create_async_engine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
 
 from typing import AsyncIterator
 
+from .. import cache
+from .. import metrics
+from .. import query_detector
+
 from .dbmodels import *
 from .item import *
 from .merchant import *
 from .user import *
 from .wallet import *
 from .transaction import *
+from .purchase import *
 
 
 connect_args = {}
 
 engine = None
+session_factory = None
 
+replica_engines = []
+replica_factories = None
+# clients that wrote recently keep reading from the primary
+sticky = cache.TTLCache(maxsize=0)
 
-def init_db(settings):
-    global engine
 
-    engine = create_async_engine(
-        settings.SQLDB_URL,
-        echo=True,
+def create_engine(settings, url=None):
+    url = make_url(url or settings.SQLDB_URL)
+    options = dict(
+        echo=settings.SQLDB_ECHO,
         future=True,
-        connect_args=connect_args,
-        poolclass=NullPool,
+        connect_args=dict(connect_args),
     )
+    if url.get_backend_name() == "sqlite":
+        options["connect_args"].setdefault("timeout", settings.SQLDB_SQLITE_BUSY_TIMEOUT)
+
+    if settings.SQLDB_ENGINE_MODE == "null":
+        options["poolclass"] = metrics.TimedNullPool
+    else:
+        options.update(
+            poolclass=metrics.TimedQueuePool,
+            pool_size=settings.SQLDB_POOL_SIZE,
+            max_overflow=settings.SQLDB_MAX_OVERFLOW,
+            pool_timeout=settings.SQLDB_POOL_TIMEOUT,
+            pool_recycle=settings.SQLDB_POOL_RECYCLE,
+            pool_pre_ping=settings.SQLDB_POOL_PRE_PING,
+        )
+        if url.get_driver_name() == "asyncpg":
+            url = url.update_query_dict(
+                {"prepared_statement_cache_size": str(settings.SQLDB_STATEMENT_CACHE_SIZE)}
+            )
+
+    return create_async_engine(url, **options)
+
+
+def init_db(settings, replica_urls=None):
+    global engine, session_factory, replica_engines, replica_factories, sticky
+
+    if replica_urls is None:
+        replica_urls = settings.SQLDB_REPLICA_URLS
+
+    engine = create_engine(settings)
+    replica_engines = [create_engine(settings, url) for url in replica_urls]
+    for each in [engine] + replica_engines:
+        metrics.instrument_engine(each)
+        query_detector.instrument_engine(each)
+
+    session_factory = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    replica_factories = None
+    if replica_engines:
+        replica_factories = itertools.cycle(
+            [sessionmaker(each, class_=AsyncSession, expire_on_commit=False) for each in replica_engines]
+        )
+    sticky = cache.TTLCache(maxsize=100_000, ttl=settings.SQLDB_READ_AFTER_WRITE_SECONDS)
 
 
 async def recreate_table():
@@ -38,14 +91,51 @@ async def recreate_table():
         await conn.run_sync(SQLModel.metadata.create_all)
 
 
-async def get_session() -> AsyncIterator[AsyncSession]:
-    async_session = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
-    async with async_session() as session:
+def client_key(request: Request) -> str:
+    authorization = request.headers.get("authorization")
+    if authorization:
+        return authorization
+    return request.client.host if request.client else ""
+
+
+@event.listens_for(Session, "after_commit")
+def mark_committed(session):
+    session.info["committed"] = True
+
+
+async def get_session(request: Request) -> AsyncIterator[AsyncSession]:
+    async with session_factory() as session:
         yield session
+        if session.info.get("committed"):
+            sticky.set(client_key(request), True)
+
+
+async def get_read_session(
+    request: Request, session: AsyncSession = Depends(get_session)
+) -> AsyncIterator[AsyncSession]:
+    # Replicas may lag; a client that has just written stays on the primary
+    # for SQLDB_READ_AFTER_WRITE_SECONDS so it reads its own writes.
+    if replica_factories is None or sticky.get(client_key(request)):
+        yield session
+        return
+    async with next(replica_factories)() as replica:
+        yield replica
+
+
+async def begin_write(session: AsyncSession):
+    # pysqlite only emits a deferred BEGIN before the first write, so the
+    # transaction would have to upgrade its lock mid-way and concurrent
+    # writers fail with "database is locked". Take the write lock up front;
+    # row locks taken by the UPDATE do the same job on PostgreSQL.
+    conn = await session.connection()
+    if conn.dialect.name == "sqlite":
+        await conn.exec_driver_sql("BEGIN IMMEDIATE")
 
 
 async def close_session():
     global engine
     if engine is None:
         raise Exception("DatabaseSessionManager is not initialized")
-    await engine.dispose()
\ No newline at end of file
+    await engine.dispose()
+    for replica in replica_engines:
+        await replica.dispose()
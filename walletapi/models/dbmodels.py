@@ -1,6 +1,7 @@
 from typing import Optional
 
-from sqlmodel import Field, SQLModel, Relationship
+from sqlmodel import Field, SQLModel, Relationship, Index
+from sqlalchemy import text
 
 from .merchant import MerchantBase
 from .item import ItemBase
@@ -10,14 +11,15 @@ from .user import UserBase
 
 import datetime
 
-import bcrypt
-
-# from passlib.context import CryptContext
-
-# pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+from .. import hashing
 
 class DBUser(UserBase, SQLModel, table=True):
     __tablename__ = "users"
+    __table_args__ = (
+        # login accepts either, so both are looked up on every /token
+        Index("ix_users_username", "username", unique=True),
+        Index("ix_users_email", "email", unique=True),
+    )
     id: int | None = Field(default=None, primary_key=True)
 
     password: str
@@ -33,33 +35,47 @@ class DBUser(UserBase, SQLModel, table=True):
         return False
 
     async def get_encrypted_password(self, plain_password):
-        return bcrypt.hashpw(
-            plain_password.encode("utf-8"), salt=bcrypt.gensalt()
-        ).decode("utf-8")
+        return await hashing.get_service().hash_password(plain_password)
 
     async def set_password(self, plain_password):
         self.password = await self.get_encrypted_password(plain_password)
 
     async def verify_password(self, plain_password):
-        return bcrypt.checkpw(
-            plain_password.encode("utf-8"), self.password.encode("utf-8")
+        return await hashing.get_service().verify_password(
+            plain_password, self.password
         )
     
+def version_field():
+    # bumped by every write, used for ETags
+    return Field(default=1, sa_column_kwargs={"server_default": text("1")})
+
 class DBWallet(WalletBase, SQLModel, table=True):
     __tablename__ = "wallets"
     id: Optional[int] = Field(default=None, primary_key=True)
+    version: int = version_field()
     transactions: list["DBTransaction"] = Relationship(back_populates="wallet")
 
 class DBMerchant(MerchantBase, SQLModel, table=True):
     __tablename__ = "merchants"
     id: Optional[int] = Field(default=None, primary_key=True)
+    version: int = version_field()
     items: list["DBItem"] = Relationship(back_populates="merchant", cascade_delete=True)
     user_id: int = Field(default=None, foreign_key="users.id")
     user: DBUser | None = Relationship()
+    # 0 credits balance directly, N > 0 spreads credits over N stripe rows
+    balance_stripes: int = Field(default=0)
+
+class DBMerchantBalanceStripe(SQLModel, table=True):
+    __tablename__ = "merchant_balance_stripes"
+    merchant_id: int = Field(foreign_key="merchants.id", primary_key=True)
+    stripe: int = Field(primary_key=True)
+    balance: float = 0.0
 
 class DBItem(ItemBase, SQLModel, table=True):
     __tablename__ = "items"
+    __table_args__ = (Index("ix_items_merchant_id", "merchant_id"),)
     id: Optional[int] = Field(default=None, primary_key=True)
+    version: int = version_field()
     merchant_id: Optional[int] = Field(default=None, foreign_key="merchants.id")
     merchant: Optional[DBMerchant] = Relationship(back_populates="items")
     transactions: list["DBTransaction"] = Relationship(back_populates="item")
@@ -68,6 +84,12 @@ class DBItem(ItemBase, SQLModel, table=True):
 
 class DBTransaction(TransactionBase, SQLModel, table=True):
     __tablename__ = "transactions"
+    __table_args__ = (
+        # wallet statements: equality on wallet_id, range scan on the date
+        # also serves lookups on wallet_id alone
+        Index("ix_transactions_wallet_id_transaction_date", "wallet_id", "transaction_date"),
+        Index("ix_transactions_item_id", "item_id"),
+    )
     id: Optional[int] = Field(default=None, primary_key=True)
     wallet_id: int = Field(foreign_key="wallets.id")
     wallet: DBWallet = Relationship(back_populates="transactions")
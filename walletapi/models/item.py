@@ -21,6 +21,14 @@ class Item(ItemBase):
 class ItemList(BaseModel):
     model_config = ConfigDict(from_attributes=True)
     items: list[Item]
-    page: int
-    page_count: int
-    size_per_page: int
\ No newline at end of file
+    page: int | None = None
+    page_count: int | None = None
+    size_per_page: int
+    next_cursor: str | None = None
+
+class ItemImportResult(BaseModel):
+    imported: int
+    failed: int
+    errors: list[dict]
+    elapsed_seconds: float
+    rows_per_second: float
\ No newline at end of file
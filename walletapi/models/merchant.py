@@ -22,6 +22,7 @@ class MerchantList(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
     merchants: list[Merchant]
-    page: int
-    page_count: int
-    size_per_page: int
\ No newline at end of file
+    page: int | None = None
+    page_count: int | None = None
+    size_per_page: int
+    next_cursor: str | None = None
\ No newline at end of file
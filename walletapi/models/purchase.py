@@ -0,0 +1,12 @@
+import pydantic
+from pydantic import BaseModel
+
+
+class PurchaseLine(BaseModel):
+    item_id: int
+    quantity: int = pydantic.Field(default=1, ge=1, le=100)
+
+
+class BatchPurchase(BaseModel):
+    wallet_id: int
+    items: list[PurchaseLine] = pydantic.Field(min_length=1, max_length=100)
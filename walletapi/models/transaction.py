@@ -21,6 +21,7 @@ class Transaction(TransactionBase):
 class TransactionList(BaseModel):
     model_config = ConfigDict(from_attributes=True)
     transactions: list[Transaction]
-    page: int
-    page_count: int
-    size_per_page: int
\ No newline at end of file
+    page: int | None = None
+    page_count: int | None = None
+    size_per_page: int
+    next_cursor: str | None = None
\ No newline at end of file
@@ -0,0 +1,108 @@
+import base64
+import datetime
+import json
+import math
+
+from fastapi import HTTPException, Query, Request
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel
+from sqlalchemy import and_, or_
+
+from typing import Annotated
+
+
+class Page(BaseModel):
+    page: int = 1
+    size: int
+    after: list | None = None
+    exact_count: bool = False
+
+    @property
+    def offset(self) -> int:
+        return (self.page - 1) * self.size
+
+    @property
+    def after_id(self) -> int:
+        try:
+            return int(self.after[0])
+        except (TypeError, ValueError):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def encode_cursor(*values) -> str:
+    values = [v.isoformat() if isinstance(v, datetime.datetime) else v for v in values]
+    raw = json.dumps(values, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> list:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if not isinstance(values, list) or not values:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return values
+
+
+def after_date_id(query, date_column, id_column, cursor: list):
+    # keyset condition for pages ordered by (date, id)
+    try:
+        after_date = datetime.datetime.fromisoformat(cursor[0])
+        after_id = int(cursor[1])
+    except (IndexError, TypeError, ValueError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return query.where(
+        or_(date_column > after_date, and_(date_column == after_date, id_column > after_id))
+    )
+
+
+def get_page(
+    request: Request,
+    page: Annotated[int, Query(ge=1)] = 1,
+    after: Annotated[str | None, Query(description="next_cursor of the previous page")] = None,
+    size: Annotated[int | None, Query(ge=1)] = None,
+    exact_count: bool = False,
+) -> Page:
+    settings = request.app.state.settings
+    size = min(size or settings.PAGE_SIZE, settings.PAGE_SIZE_MAX)
+    return Page(
+        page=page,
+        size=size,
+        after=decode_cursor(after) if after else None,
+        exact_count=exact_count,
+    )
+
+
+def split_page(rows: list, page: Page, key) -> tuple[list, str | None]:
+    # queries fetch size + 1 rows; the extra one only tells us there is more
+    if len(rows) <= page.size:
+        return rows, None
+    rows = rows[: page.size]
+    return rows, encode_cursor(*key(rows[-1]))
+
+
+def page_count(count: int, page: Page) -> int:
+    return int(math.ceil(count / page.size))
+
+
+def columns(table, schema, *extra) -> list:
+    # only what the response shows, plus what the cursor or the ETag needs
+    return [getattr(table, name) for name in schema.model_fields] + list(extra)
+
+
+def page_response(key: str, rows: list, page: int | None, page_count: int | None, size: int, next_cursor: str | None, exclude=(), headers=None) -> ORJSONResponse:
+    # Rows are column tuples selected by columns(); they go straight to orjson
+    # instead of through the list model and response_model again.
+    content = {
+        key: [
+            {name: value for name, value in row._mapping.items() if name not in exclude}
+            for row in rows
+        ],
+        "page": page,
+        "page_count": page_count,
+        "size_per_page": size,
+        "next_cursor": next_cursor,
+    }
+    return ORJSONResponse(content, headers=headers)
@@ -0,0 +1,172 @@
+import datetime
+
+from sqlalchemy import exc
+from sqlmodel import select, update, exists
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from .models import begin_write
+from .models.dbmodels import DBWallet, DBTransaction
+from . import entity_cache
+from . import merchant_balance
+
+
+class PurchaseError(Exception):
+    status_code = 400
+    headers = None
+
+    def __init__(self, detail: str):
+        super().__init__(detail)
+        self.detail = detail
+
+
+class ItemNotFoundError(PurchaseError):
+    status_code = 404
+
+
+class WalletNotFoundError(PurchaseError):
+    status_code = 404
+
+
+class InsufficientBalanceError(PurchaseError):
+    status_code = 400
+
+
+class PurchaseBusyError(PurchaseError):
+    status_code = 503
+    headers = {"Retry-After": "1"}
+
+
+async def debit_wallet(session: AsyncSession, wallet_id: int, amount: float) -> float:
+    # The balance check is part of the UPDATE, so concurrent purchases on the
+    # same wallet cannot both pass it.
+    result = await session.exec(
+        update(DBWallet)
+        .where(DBWallet.id == wallet_id, DBWallet.balance >= amount)
+        .values(balance=DBWallet.balance - amount, version=DBWallet.version + 1)
+        .returning(DBWallet.balance)
+    )
+    balance = result.scalar_one_or_none()
+    if balance is not None:
+        return balance
+
+    result = await session.exec(select(exists().where(DBWallet.id == wallet_id)))
+    if not result.one():
+        raise WalletNotFoundError("Wallet not found")
+    raise InsufficientBalanceError("Insufficient balance")
+
+
+async def buy_item(session: AsyncSession, item_id: int, wallet_id: int) -> dict:
+    try:
+        await begin_write(session)
+        item = await entity_cache.get_item(session, item_id)
+        if item is None:
+            raise ItemNotFoundError("Item not found")
+        name, price, merchant_id = item["name"], item["price"], item["merchant_id"]
+
+        balance = await debit_wallet(session, wallet_id, price)
+        if merchant_id is not None:
+            await merchant_balance.credit(
+                session, merchant_id, item["balance_stripes"], wallet_id, price
+            )
+
+        session.add(
+            DBTransaction(
+                price=price,
+                wallet_id=wallet_id,
+                item_id=item_id,
+                description=f"Bought {name}",
+                transaction_date=datetime.datetime.now(tz=datetime.timezone.utc),
+            )
+        )
+        await session.commit()
+    except PurchaseError:
+        await session.rollback()
+        raise
+    except exc.IntegrityError:
+        # the cached item was deleted meanwhile
+        await session.rollback()
+        entity_cache.invalidate_item(item_id)
+        raise ItemNotFoundError("Item not found")
+    except exc.OperationalError:
+        # lock timeout or deadlock: nothing was applied, the client may retry
+        await session.rollback()
+        raise PurchaseBusyError("Wallet is busy, try again later")
+
+    return purchase_result(item_id, name, price, item["merchant_name"], balance)
+
+
+def purchase_result(item_id, name, price, merchant_name, balance) -> dict:
+    return {
+        "message": f"Successfully bought {name}",
+        "amount": balance,
+        "item": {"item_id": item_id, "name": name, "price": price},
+        "merchant": {"name": merchant_name},
+    }
+
+
+async def buy_items(session: AsyncSession, wallet_id: int, lines) -> list[dict]:
+    quantities = {}
+    for line in lines:
+        quantities[line.item_id] = quantities.get(line.item_id, 0) + line.quantity
+
+    try:
+        await begin_write(session)
+        items = await entity_cache.get_items(session, quantities)
+        if len(items) != len(quantities):
+            raise ItemNotFoundError("Item not found")
+
+        total = 0.0
+        credits = {}
+        stripes = {}
+        for item_id, quantity in quantities.items():
+            item = items[item_id]
+            total += item["price"] * quantity
+            if item["merchant_id"] is not None:
+                merchant_id = item["merchant_id"]
+                credits[merchant_id] = credits.get(merchant_id, 0.0) + item["price"] * quantity
+                stripes[merchant_id] = item["balance_stripes"]
+
+        balance = await debit_wallet(session, wallet_id, total)
+        # a fixed order keeps concurrent batches from deadlocking on merchants
+        for merchant_id in sorted(credits):
+            await merchant_balance.credit(
+                session, merchant_id, stripes[merchant_id], wallet_id, credits[merchant_id]
+            )
+
+        now = datetime.datetime.now(tz=datetime.timezone.utc)
+        responses = []
+        running_balance = balance + total
+        for line in lines:
+            item = items[line.item_id]
+            for _ in range(line.quantity):
+                running_balance -= item["price"]
+                session.add(
+                    DBTransaction(
+                        price=item["price"],
+                        wallet_id=wallet_id,
+                        item_id=item["id"],
+                        description=f"Bought {item['name']}",
+                        transaction_date=now,
+                    )
+                )
+                responses.append(
+                    purchase_result(
+                        item["id"], item["name"], item["price"], item["merchant_name"], running_balance
+                    )
+                )
+        await session.commit()
+    except PurchaseError:
+        await session.rollback()
+        raise
+    except exc.IntegrityError:
+        await session.rollback()
+        for item_id in quantities:
+            entity_cache.invalidate_item(item_id)
+        raise ItemNotFoundError("Item not found")
+    except exc.OperationalError:
+        await session.rollback()
+        raise PurchaseBusyError("Wallet is busy, try again later")
+
+    if responses:
+        responses[-1]["amount"] = balance
+    return responses
@@ -0,0 +1,118 @@
+import contextlib
+import contextvars
+import logging
+import time
+
+from sqlalchemy import event
+
+
+logger = logging.getLogger(__name__)
+
+# "off" installs nothing, "log" reports at the end of the request, "raise"
+# fails the statement that crosses the budget or runs too long
+mode = "off"
+budget = 20
+slow_seconds = 0.5
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+class SlowQuery(Exception):
+    pass
+
+
+class Tracker:
+    def __init__(self, budget: int, mode: str, scope=None):
+        self.budget = budget
+        self.mode = mode
+        self.scope = scope
+        self.statements = []
+
+    @property
+    def handler(self) -> str:
+        endpoint = self.scope.get("endpoint") if self.scope else None
+        if endpoint is None:
+            return "unknown handler"
+        return f"{endpoint.__module__}.{endpoint.__qualname__}"
+
+    def report(self) -> str:
+        lines = [f"{self.handler} ran {len(self.statements)} statements (budget {self.budget}):"]
+        lines += [f"  {seconds * 1000:.1f}ms {statement}" for statement, seconds in self.statements]
+        return "\n".join(lines)
+
+
+current = contextvars.ContextVar("query_tracker", default=None)
+
+
+def init_query_detector(settings):
+    global mode, budget, slow_seconds
+    mode = settings.QUERY_DETECTOR
+    budget = settings.QUERY_BUDGET
+    slow_seconds = settings.SLOW_QUERY_SECONDS
+
+
+@contextlib.contextmanager
+def expect_queries(limit: int):
+    # for tests: raise as soon as the wrapped code runs more than limit statements
+    tracker = Tracker(limit, "raise")
+    token = current.set(tracker)
+    try:
+        yield tracker
+    finally:
+        current.reset(token)
+
+
+def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    tracker = current.get()
+    if tracker is None:
+        return
+    if len(tracker.statements) >= tracker.budget and tracker.mode == "raise":
+        tracker.statements.append((statement, 0.0))
+        raise QueryBudgetExceeded(tracker.report())
+    conn.info.setdefault("detector_started", []).append(time.perf_counter())
+
+
+def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    tracker = current.get()
+    if tracker is None or not conn.info.get("detector_started"):
+        return
+    elapsed = time.perf_counter() - conn.info["detector_started"].pop()
+    tracker.statements.append((statement, elapsed))
+    if elapsed > slow_seconds:
+        message = f"slow query in {tracker.handler} ({elapsed:.3f}s): {statement}"
+        if tracker.mode == "raise":
+            raise SlowQuery(message)
+        logger.warning(message)
+
+
+def instrument_engine(engine):
+    sync_engine = engine.sync_engine
+    if not event.contains(sync_engine, "before_cursor_execute", before_cursor_execute):
+        event.listen(sync_engine, "before_cursor_execute", before_cursor_execute)
+        event.listen(sync_engine, "after_cursor_execute", after_cursor_execute)
+
+
+class QueryDetectorMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        tracker = current.get()
+        if tracker is not None:
+            # a test's expect_queries is already watching, lend it the scope
+            tracker.scope = scope
+            return await self.app(scope, receive, send)
+
+        tracker = Tracker(budget, mode, scope)
+        token = current.set(tracker)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            current.reset(token)
+        if len(tracker.statements) > tracker.budget:
+            logger.warning(tracker.report())
@@ -0,0 +1,71 @@
+import asyncio
+import json
+import logging
+import os
+import time
+
+
+logger = logging.getLogger(__name__)
+
+# jti -> exp of refresh tokens that must not be used again. Entries are
+# dropped once the token would have expired anyway, so the list only holds
+# what is still redeemable.
+revoked: dict[str, int] = {}
+path = None
+dirty = False
+
+
+def init_revocation(settings):
+    global revoked, path, dirty
+    path = settings.TOKEN_REVOCATION_FILE
+    revoked = load(path) if path else {}
+    dirty = False
+
+
+def prune(entries: dict[str, int], now: float) -> dict[str, int]:
+    return {jti: exp for jti, exp in entries.items() if exp > now}
+
+
+def load(filename: str) -> dict[str, int]:
+    try:
+        with open(filename) as f:
+            return prune(json.load(f), time.time())
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError):
+        logger.exception("could not read revocation list %s", filename)
+        return {}
+
+
+def is_revoked(jti: str) -> bool:
+    exp = revoked.get(jti)
+    return exp is not None and exp > time.time()
+
+
+def revoke(jti: str, exp: int):
+    global revoked, dirty
+    revoked[jti] = int(exp)
+    dirty = True
+    if len(revoked) % 1024 == 0:
+        revoked = prune(revoked, time.time())
+
+
+def write(filename: str, entries: dict[str, int]):
+    # merge with what other workers saved, then replace the file atomically
+    merged = {**load(filename), **entries}
+    tmp = f"{filename}.{os.getpid()}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(prune(merged, time.time()), f, separators=(",", ":"))
+    os.replace(tmp, filename)
+
+
+async def save():
+    global dirty
+    if not path or not dirty:
+        return
+    dirty = False
+    try:
+        await asyncio.to_thread(write, path, dict(revoked))
+    except Exception:
+        dirty = True
+        raise
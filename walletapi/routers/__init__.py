@@ -1,11 +1,11 @@
-from . import items, merchants, wallets, transactions, buy_item, users, authentication
+import importlib
+
+# Imported by create_app rather than at package import, so importing
+# walletapi.main stays cheap for process managers and tools.
+ROUTERS = ("users", "authentication", "wallets", "merchants", "items", "buy_item", "transactions", "metrics")
 
 
 def init_routers(app):
-    app.include_router(users.router)
-    app.include_router(authentication.router)
-    app.include_router(wallets.router)
-    app.include_router(merchants.router)
-    app.include_router(items.router)
-    app.include_router(buy_item.router)
-    app.include_router(transactions.router)
\ No newline at end of file
+    for name in ROUTERS:
+        module = importlib.import_module(f".{name}", __name__)
+        app.include_router(module.router)
@@ -1,43 +1,52 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, Form, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordRequestForm
 
-from sqlmodel import select
+from sqlmodel import select, or_
 
 from sqlmodel.ext.asyncio.session import AsyncSession
 
 from typing import Annotated
 import datetime
+import jwt
 
 from .. import config
 from .. import models
 from ..models.user import Token
 from ..models.dbmodels import DBUser
+from .. import last_login
+from .. import revocation
 from .. import security
+from .. import throttle
 
 router = APIRouter(tags=["authentication"])
 
-settings = config.get_settings()
-
 
 @router.post(
     "/token",
 )
 async def authentication(
+    request: Request,
     form_data: Annotated[OAuth2PasswordRequestForm, Depends()],
-    session: Annotated[AsyncSession, Depends(models.get_session)],
+    session: Annotated[AsyncSession, Depends(models.get_read_session)],
 ) -> Token:
-
+    # before any lookup or bcrypt work
+    try:
+        throttle.check_login(form_data.username, request.client.host if request.client else None)
+    except throttle.LoginThrottledError as e:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after)},
+        )
+    # one query over both unique indexes; a username match wins over an email
     result = await session.exec(
-        select(DBUser).where(DBUser.username == form_data.username)
+        select(DBUser)
+        .where(or_(DBUser.username == form_data.username, DBUser.email == form_data.username))
+        .order_by((DBUser.username == form_data.username).desc())
+        .limit(1)
     )
 
-    user = result.one_or_none()
-
-    if not user:
-        result = await session.exec(
-            select(DBUser).where(DBUser.email == form_data.username)
-        )
-        user = result.one_or_none()
+    user = result.first()
 
     if not user:
         raise HTTPException(
@@ -51,28 +60,52 @@ async def authentication(
             detail="Incorrect username or password",
         )
 
-    user.last_login_date = datetime.datetime.now()
+    # written later in one batch by last_login.flush
+    login_date = datetime.datetime.now()
+    last_login.record(user.id, login_date)
+
+    return issue_tokens(user.id, login_date)
 
-    session.add(user)
-    await session.commit()
-    await session.refresh(user)
 
+@router.post("/token/refresh")
+async def refresh(refresh_token: Annotated[str, Form()]) -> Token:
+    # signature and revocation list only: no password check, no user query
+    try:
+        payload = security.decode_refresh_token(refresh_token)
+    except jwt.InvalidTokenError:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid refresh token",
+        )
+
+    if revocation.is_revoked(payload["jti"]):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Refresh token has been used",
+        )
+
+    # rotation: each refresh token is redeemable once
+    revocation.revoke(payload["jti"], payload["exp"])
+    return issue_tokens(payload["sub"], datetime.datetime.now())
+
+
+def issue_tokens(user_id: int, issued_at: datetime.datetime) -> Token:
+    settings = config.get_settings()
     access_token_expires = datetime.timedelta(
         minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES
     )
     return Token(
         access_token=security.create_access_token(
-            data={"sub": user.id},
+            data={"sub": user_id},
             expires_delta=access_token_expires,
         ),
         refresh_token=security.create_refresh_token(
-            data={"sub": user.id},
-            expires_delta=access_token_expires,
+            data={"sub": user_id},
         ),
         token_type="Bearer",
         scope="",
         expires_in=settings.ACCESS_TOKEN_EXPIRE_MINUTES,
         expires_at=datetime.datetime.now() + access_token_expires,
-        issued_at=user.last_login_date,
-        user_id=user.id,
+        issued_at=issued_at,
+        user_id=user_id,
     )
\ No newline at end of file
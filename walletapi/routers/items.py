@@ -1,37 +1,54 @@
-from fastapi import APIRouter, HTTPException, Depends
+import logging
+
+from fastapi import APIRouter, HTTPException, Depends, Request, Response
 
 from typing import Annotated
 
-from sqlmodel import select, func
+from sqlmodel import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from .. import models
 from .. import deps
-import math
+from .. import catalog_import
+from .. import conditional
+from .. import counting
+from .. import entity_cache
+from .. import pagination
 
-from ..models.item import Item, CreateItem, UpdateItem, ItemList
+from ..models.item import Item, CreateItem, UpdateItem, ItemList, ItemImportResult
 from ..models.user import User
 from ..models.dbmodels import DBItem, DBMerchant
 
-router = APIRouter(prefix="/items", tags=["Item"])
+logger = logging.getLogger(__name__)
 
-SIZE_PER_PAGE = 50
+router = APIRouter(prefix="/items", tags=["Item"])
 
 @router.get("", response_model=ItemList)
-async def read_items(session: Annotated[AsyncSession, Depends(models.get_session)], page: int = 1) -> ItemList:
-    result = await session.exec(
-        select(DBItem).offset((page - 1) * SIZE_PER_PAGE).limit(SIZE_PER_PAGE)
-    )
-    db_items = result.all()
+async def read_items(request: Request, session: Annotated[AsyncSession, Depends(models.get_read_session)], paging: Annotated[pagination.Page, Depends(pagination.get_page)]) -> ItemList:
+    query = select(*pagination.columns(DBItem, Item, DBItem.version)).order_by(DBItem.id).limit(paging.size + 1)
+    if paging.after:
+        query = query.where(DBItem.id > paging.after_id)
+    else:
+        query = query.offset(paging.offset)
+    result = await session.exec(query)
+    db_items, next_cursor = pagination.split_page(result.all(), paging, lambda item: (item.id,))
 
-    page_count = int(
-        math.ceil((await session.exec(select(func.count(DBItem.id)))).first()/SIZE_PER_PAGE)
-    )
+    page = page_count = None
+    if not paging.after:
+        page = paging.page
+        page_count = pagination.page_count(
+            await counting.count(session, DBItem, exact=paging.exact_count), paging
+        )
+
+    logger.debug("page", extra={"rows": len(db_items), "page_count": page_count})
 
-    print("page_count", page_count)
-    print("items", db_items)
+    etag = conditional.make_etag(
+        "items", page_count, next_cursor, [(item.id, item.version) for item in db_items]
+    )
+    if conditional.matches(request, etag):
+        return conditional.not_modified(etag)
 
-    return ItemList.model_validate(items=db_items, page=page, page_count=page_count, size_per_page=SIZE_PER_PAGE)
+    return pagination.page_response("items", db_items, page, page_count, paging.size, next_cursor, exclude={"version"}, headers={"ETag": etag})
     
 
 @router.post("/{merchant.id}", response_model=Item)
@@ -48,31 +65,57 @@ async def create_item(item: CreateItem, merchant_id: int, current_user: Annotate
     await session.refresh(db_item)
     return Item.model_validate(db_item)
 
-@router.get("/{wallet_id}", response_model=Item)
-async def read_item(item_id: int, session: Annotated[AsyncSession, Depends(models.get_session)],) -> Item:
-    db_item = await session.get(DBItem, item_id)
-    if db_item:
-        return Item.model_validate(db_item)
+@router.post("/import/{merchant_id}", response_model=ItemImportResult, openapi_extra={"requestBody": {"content": {"application/json": {"schema": {"type": "array", "items": CreateItem.model_json_schema()}}, "text/csv": {"schema": {"type": "string"}}}}})
+async def import_items(merchant_id: int, request: Request, current_user: Annotated[User, Depends(deps.get_current_user)], session: Annotated[AsyncSession, Depends(models.get_session)]) -> ItemImportResult:
+    if not await session.get(DBMerchant, merchant_id):
+        raise HTTPException(status_code=404, detail="Merchant not found")
+
+    content_type = request.headers.get("content-type", "").split(";")[0].strip()
+    if content_type == "text/csv":
+        rows = catalog_import.csv_rows(request.stream())
+    elif content_type == "application/json":
+        rows = catalog_import.json_rows(request.stream())
+    else:
+        raise HTTPException(status_code=415, detail="Send a JSON array or text/csv")
+
+    try:
+        result = await catalog_import.import_items(session, merchant_id, rows)
+    except catalog_import.ImportFormatError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return ItemImportResult(**result)
+
+@router.get("/{item_id}", response_model=Item)
+async def read_item(item_id: int, request: Request, response: Response, session: Annotated[AsyncSession, Depends(models.get_read_session)],) -> Item:
+    item = await entity_cache.get_item(session, item_id)
+    if item:
+        etag = conditional.make_etag("item", item["id"], item["version"])
+        if conditional.matches(request, etag):
+            return conditional.not_modified(etag)
+        response.headers["ETag"] = etag
+        return Item.model_validate(item)
     raise HTTPException(status_code=404, detail="Item not found")
 
-@router.put("/{wallet_id}", response_model=Item)
+@router.put("/{item_id}", response_model=Item)
 async def update_item(item_id: int, item: UpdateItem, current_user: Annotated[User, Depends(deps.get_current_user)], session: Annotated[AsyncSession, Depends(models.get_session)],) -> Item:
     db_item = await session.get(DBItem, item_id)
     if db_item:
         for key, value in item.dict().items():
             setattr(db_item, key, value)
+        db_item.version += 1
         session.add(db_item)
         await session.commit()
+        entity_cache.invalidate_item(item_id)
         await session.refresh(db_item)
         return Item.model_validate(db_item)
     raise HTTPException(status_code=404, detail="Item not found")
 
-@router.delete("/{wallet_id}")
+@router.delete("/{item_id}")
 async def delete_item(item_id: int, current_user: Annotated[User, Depends(deps.get_current_user)], session: Annotated[AsyncSession, Depends(models.get_session)],) -> dict:
     db_item = await session.get(DBItem, item_id)
     if db_item:
         await session.delete(db_item)
         await session.commit()
+        entity_cache.invalidate_item(item_id)
         return {"message": "Item deleted successfully"}
     raise HTTPException(status_code=404, detail="Item not found")
 
@@ -1,4 +1,6 @@
-from fastapi import APIRouter, HTTPException, Depends
+import logging
+
+from fastapi import APIRouter, HTTPException, Depends, Query, Request, Response
 
 from sqlmodel import select
 from ..models.merchant import Merchant, CreateMerchant, UpdateMerchant, MerchantList
@@ -6,51 +8,72 @@ from ..models.dbmodels import DBMerchant
 
 from typing import Annotated
 
-from sqlmodel import select, func
+from sqlmodel import select
 
 from sqlmodel.ext.asyncio.session import AsyncSession
 
 from ..models.user import User
 
 from .. import models
+from .. import conditional
 from .. import deps
-import math
+from .. import entity_cache
+from .. import merchant_balance
+from .. import counting
+from .. import pagination
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/merchants", tags=["Merchant"])
 
 @router.post("", response_model=Merchant)
 async def create_merchant(merchant: CreateMerchant, current_user: Annotated[User, Depends(deps.get_current_user)], session: Annotated[AsyncSession, Depends(models.get_session)]) -> Merchant:
     db_merchant = DBMerchant.model_validate(merchant)
-    db_merchant.user = current_user
+    db_merchant.user_id = current_user.id
     session.add(db_merchant)
     await session.commit()
     await session.refresh(db_merchant)
     return Merchant.model_validate(db_merchant)
 
-SIZE_PER_PAGE = 50
-
 @router.get("",response_model=MerchantList)
-async def read_merchants(session: Annotated[AsyncSession, Depends(models.get_session)], page: int = 1) -> MerchantList:
-    result = await session.exec(
-        select(DBMerchant).offset((page - 1) * SIZE_PER_PAGE).limit(SIZE_PER_PAGE)
-    )
-    db_merchant = result.all()
-
-    page_count = int(
-        math.ceil((await session.exec(select(func.count(DBMerchant.id)))).first()/SIZE_PER_PAGE)
+async def read_merchants(request: Request, session: Annotated[AsyncSession, Depends(models.get_read_session)], paging: Annotated[pagination.Page, Depends(pagination.get_page)]) -> MerchantList:
+    query = select(*pagination.columns(DBMerchant, Merchant, DBMerchant.version)).order_by(DBMerchant.id).limit(paging.size + 1)
+    if paging.after:
+        query = query.where(DBMerchant.id > paging.after_id)
+    else:
+        query = query.offset(paging.offset)
+    result = await session.exec(query)
+    db_merchant, next_cursor = pagination.split_page(result.all(), paging, lambda merchant: (merchant.id,))
+
+    page = page_count = None
+    if not paging.after:
+        page = paging.page
+        page_count = pagination.page_count(
+            await counting.count(session, DBMerchant, exact=paging.exact_count), paging
+        )
+
+    logger.debug("page", extra={"rows": len(db_merchant), "page_count": page_count})
+
+    etag = conditional.make_etag(
+        "merchants", page_count, next_cursor, [(m.id, m.version) for m in db_merchant]
     )
+    if conditional.matches(request, etag):
+        return conditional.not_modified(etag)
 
-    print("page_count", page_count)
-    print("merchant", db_merchant)
-
-    return MerchantList.model_validate(merchant=db_merchant, page=page, page_count=page_count, size_per_page=SIZE_PER_PAGE)
+    return pagination.page_response("merchants", db_merchant, page, page_count, paging.size, next_cursor, exclude={"version"}, headers={"ETag": etag})
 
 
 @router.get("/{merchant_id}", response_model=Merchant)
-async def read_merchant(merchant_id: int, session: Annotated[AsyncSession, Depends(models.get_session)]) -> Merchant:
-    db_merchant = await session.get(DBMerchant, merchant_id)
-    if db_merchant:
-        return Merchant.model_validate(db_merchant)
+async def read_merchant(merchant_id: int, request: Request, response: Response, session: Annotated[AsyncSession, Depends(models.get_read_session)]) -> Merchant:
+    merchant = await entity_cache.get_merchant(session, merchant_id)
+    if merchant:
+        # the balance is always read live, only the identity is cached
+        balance = await merchant_balance.get_balance(session, merchant_id)
+        etag = conditional.make_etag("merchant", merchant["id"], merchant["version"], balance)
+        if conditional.matches(request, etag):
+            return conditional.not_modified(etag)
+        response.headers["ETag"] = etag
+        return Merchant.model_validate(merchant | {"balance": balance})
     raise HTTPException(status_code=404, detail="Merchant not found")
 
 @router.put("/{merchant_id}", response_model=Merchant)
@@ -59,17 +82,41 @@ async def update_merchant(merchant_id: int, current_user: Annotated[User, Depend
     if db_merchant:
         for key, value in merchant.dict().items():
             setattr(db_merchant, key, value)
+        db_merchant.version += 1
         session.add(db_merchant)
         await session.commit()
+        entity_cache.invalidate_merchant(merchant_id)
         await session.refresh(db_merchant)
         return Merchant.model_validate(db_merchant)
     raise HTTPException(status_code=404, detail="Merchant not found")
 
 @router.delete("/{merchant_id}")
 async def delete_merchant(merchant_id: int, current_user: Annotated[User, Depends(deps.get_current_user)], session: Annotated[AsyncSession, Depends(models.get_session)]) -> dict:
-    db_merchant = session.get(Merchant, merchant_id)
+    db_merchant = await session.get(DBMerchant, merchant_id)
     if db_merchant:
         await session.delete(db_merchant)
         await session.commit()
+        entity_cache.invalidate_merchant(merchant_id)
         return {"message": "Merchant and item deleted successfully"}
-    raise HTTPException(status_code=404, detail="Merchant not found")
\ No newline at end of file
+    raise HTTPException(status_code=404, detail="Merchant not found")
+
+@router.put("/{merchant_id}/balance_stripes", response_model=Merchant)
+async def set_balance_stripes(merchant_id: int, stripes: Annotated[int, Query(ge=0, le=256)], current_user: Annotated[User, Depends(deps.get_current_user)], session: Annotated[AsyncSession, Depends(models.get_session)]) -> Merchant:
+    db_merchant = await session.get(DBMerchant, merchant_id)
+    if not db_merchant:
+        raise HTTPException(status_code=404, detail="Merchant not found")
+    await merchant_balance.set_stripes(session, merchant_id, stripes)
+    entity_cache.invalidate_merchant(merchant_id)
+    await session.refresh(db_merchant)
+    return Merchant.model_validate(db_merchant)
+
+@router.post("/{merchant_id}/fold", response_model=Merchant)
+async def fold_balance(merchant_id: int, current_user: Annotated[User, Depends(deps.get_current_user)], session: Annotated[AsyncSession, Depends(models.get_session)]) -> Merchant:
+    await models.begin_write(session)
+    db_merchant = await session.get(DBMerchant, merchant_id)
+    if not db_merchant:
+        raise HTTPException(status_code=404, detail="Merchant not found")
+    await merchant_balance.fold(session, merchant_id)
+    await session.commit()
+    await session.refresh(db_merchant)
+    return Merchant.model_validate(db_merchant)
@@ -0,0 +1,49 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from .. import counting
+from .. import deps
+from .. import entity_cache
+from .. import hashing
+from .. import metrics
+from .. import models
+from .. import throttle
+
+router = APIRouter(tags=["metrics"])
+
+
+def stats_families() -> list[metrics.Family]:
+    # gathered at scrape time from the components' own counters
+    hashing_stats = metrics.Family("walletapi_hashing", "gauge", "Password hashing pool", labels=("stat",))
+    for key, value in hashing.get_service().stats().items():
+        hashing_stats.set(key, value=value)
+
+    caches = {
+        "principal": deps.principal_cache,
+        "items": entity_cache.items,
+        "merchants": entity_cache.merchants,
+        "counts": counting.counts,
+    }
+    cache_stats = metrics.Family("walletapi_cache", "gauge", "In-process caches", labels=("cache", "stat"))
+    for name, cache in caches.items():
+        for key, value in cache.stats().items():
+            cache_stats.set(name, key, value=value)
+
+    pool_stats = metrics.Family("walletapi_db_pool_checked_out", "gauge", "Connections in use")
+    checkedout = getattr(models.engine.pool, "checkedout", None)
+    if checkedout is not None:
+        pool_stats.set(value=checkedout())
+
+    throttle_stats = metrics.Family("walletapi_login_throttle", "gauge", "Login limiters", labels=("limiter", "stat"))
+    for name, limiter_stats in throttle.stats().items():
+        for key, value in limiter_stats.items():
+            throttle_stats.set(name, key, value=value)
+
+    return [hashing_stats, cache_stats, pool_stats, throttle_stats]
+
+
+@router.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def read_metrics() -> PlainTextResponse:
+    return PlainTextResponse(
+        metrics.render(stats_families()), media_type="text/plain; version=0.0.4"
+    )
@@ -1,38 +1,98 @@
-from fastapi import APIRouter, HTTPException, Depends
+import logging
 
-from sqlmodel import select, func
+from fastapi import APIRouter, HTTPException, Depends, Request
+from fastapi.responses import StreamingResponse
+
+from sqlmodel import select
 from ..models.transaction import Transaction, UpdateTransaction, TransactionList
-from ..models.dbmodels import DBTransaction
+from ..models.dbmodels import DBTransaction, DBItem
+
+from typing import Annotated, Literal
 
-from typing import Annotated
+import datetime
+
+from ..models.user import User
 
 from sqlmodel.ext.asyncio.session import AsyncSession
 
 from .. import models
-import math
+from .. import conditional
+from .. import deps
+from .. import counting
+from .. import export
+from .. import pagination
 
-router = APIRouter(prefix="/transactions", tags=["Transaction"])
+logger = logging.getLogger(__name__)
 
-SIZE_PER_PAGE = 50
+router = APIRouter(prefix="/transactions", tags=["Transaction"])
 
 @router.get("",response_model=TransactionList)
-async def read_transactions(session: Annotated[AsyncSession, Depends(models.get_session)], page: int = 1) -> TransactionList:
-    result = await session.exec(
-        select(DBTransaction).offset((page - 1) * SIZE_PER_PAGE).limit(SIZE_PER_PAGE)
+async def read_transactions(request: Request, session: Annotated[AsyncSession, Depends(models.get_read_session)], paging: Annotated[pagination.Page, Depends(pagination.get_page)]) -> TransactionList:
+    query = (
+        select(*pagination.columns(DBTransaction, Transaction, DBTransaction.transaction_date))
+        .order_by(DBTransaction.transaction_date, DBTransaction.id)
+        .limit(paging.size + 1)
+    )
+    if paging.after:
+        query = pagination.after_date_id(
+            query, DBTransaction.transaction_date, DBTransaction.id, paging.after
+        )
+    else:
+        query = query.offset(paging.offset)
+    result = await session.exec(query)
+    db_transaction, next_cursor = pagination.split_page(
+        result.all(), paging, lambda transaction: (transaction.transaction_date, transaction.id)
     )
-    db_transaction = result.all()
 
-    page_count = int(
-        math.ceil((await session.exec(select(func.count(DBTransaction.id)))).first()/SIZE_PER_PAGE)
+    page = page_count = None
+    if not paging.after:
+        page = paging.page
+        page_count = pagination.page_count(
+            await counting.count(session, DBTransaction, exact=paging.exact_count), paging
+        )
+
+    logger.debug("page", extra={"rows": len(db_transaction), "page_count": page_count})
+
+    # transactions carry no version column; hash the mutable fields instead
+    etag = conditional.make_etag(
+        "transactions",
+        page_count,
+        next_cursor,
+        [(t.id, t.price, t.wallet_id, t.description) for t in db_transaction],
     )
+    if conditional.matches(request, etag):
+        return conditional.not_modified(etag)
+
+    return pagination.page_response("transactions", db_transaction, page, page_count, paging.size, next_cursor, exclude={"transaction_date"}, headers={"ETag": etag})
+
+EXPORT_COLUMNS = ["id", "wallet_id", "item_id", "price", "description", "transaction_date"]
 
-    print("page_count", page_count)
-    print("transaction", db_transaction)
+EXPORT_MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
 
-    return TransactionList(transaction=db_transaction, page=page, page_count=page_count, size_per_page=SIZE_PER_PAGE)
+@router.get("/export")
+async def export_transactions(current_user: Annotated[User, Depends(deps.get_current_user)], format: Literal["ndjson", "csv"] = "ndjson", wallet_id: int | None = None, merchant_id: int | None = None, start_date: datetime.datetime | None = None, end_date: datetime.datetime | None = None) -> StreamingResponse:
+    query = select(*[getattr(DBTransaction, column) for column in EXPORT_COLUMNS]).order_by(
+        DBTransaction.transaction_date, DBTransaction.id
+    )
+    if wallet_id is not None:
+        query = query.where(DBTransaction.wallet_id == wallet_id)
+    if merchant_id is not None:
+        query = query.join(DBItem, DBItem.id == DBTransaction.item_id).where(
+            DBItem.merchant_id == merchant_id
+        )
+    if start_date:
+        query = query.where(DBTransaction.transaction_date >= start_date)
+    if end_date:
+        query = query.where(DBTransaction.transaction_date < end_date)
+
+    return StreamingResponse(
+        export.stream_rows(query, EXPORT_COLUMNS, format),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f"attachment; filename=transactions.{format}"},
+    )
 
 @router.get("/{transaction_id}", response_model=Transaction)
-async def read_transaction(transaction_id: int, session: Annotated[AsyncSession, Depends(models.get_session)]) -> Transaction:
+async def read_transaction(transaction_id: int, session: Annotated[AsyncSession, Depends(models.get_read_session)]) -> Transaction:
     db_transaction = await session.get(DBTransaction, transaction_id)
     if db_transaction:
         return Transaction.model_validate(db_transaction)
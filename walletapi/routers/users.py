@@ -1,6 +1,6 @@
 from fastapi import APIRouter, Depends, HTTPException, Request, status
 from sqlmodel.ext.asyncio.session import AsyncSession
-from sqlmodel import select
+from sqlmodel import select, or_
 
 from typing import Annotated, Dict
 
@@ -19,10 +19,12 @@ async def create(
 ) -> User:
 
     result = await session.exec(
-        select(DBUser).where(DBUser.username == user_info.username)
+        select(DBUser.id)
+        .where(or_(DBUser.username == user_info.username, DBUser.email == user_info.email))
+        .limit(1)
     )
 
-    user = result.one_or_none()
+    user = result.first()
 
     if user:
         raise HTTPException(
@@ -59,7 +61,7 @@ async def get(
 
 
 
-@router.put("/{user_id}/change_password", response_model=User)
+@router.put("/{user_id}/change_password")
 async def change_password(
     user_id: str,
     password_update: ChangedPassword,
@@ -75,15 +77,16 @@ async def change_password(
             detail="Not found this user",
         )
 
-    if not user.verify_password(password_update.current_password):
+    if not await user.verify_password(password_update.current_password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect password",
         )
 
     await user.set_password(password_update.new_password)
-    await session.add(user)
+    session.add(user)
     await session.commit()
+    deps.invalidate_user(user.id)
     
     return {"message": "Password changed successfully"}
 
@@ -105,7 +108,7 @@ async def update(
             detail="Not found this user",
         )
 
-    if not user.verify_password(user_update.current_password):
+    if not await user.verify_password(user_update.current_password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect password",
@@ -118,5 +121,6 @@ async def update(
     session.add(user)
     await session.commit()
     await session.refresh(user)
+    deps.invalidate_user(user.id)
 
     return user
\ No newline at end of file
@@ -1,14 +1,20 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Request, Response
 
 from ..models.wallet import Wallet, CreateWallet, UpdateWallet
-from ..models.dbmodels import DBWallet
+from ..models.transaction import Transaction, TransactionList
+from ..models.dbmodels import DBWallet, DBTransaction
 
 from typing import Annotated
 
+from sqlmodel import select
 from sqlmodel.ext.asyncio.session import AsyncSession
 
 from .. import models
+from .. import conditional
 from .. import deps
+from .. import pagination
+
+import datetime
 
 from ..models.user import User
 
@@ -23,18 +29,52 @@ async def create_wallet(wallet: CreateWallet, current_user: Annotated[User, Depe
     return Wallet.model_validate(db_wallet)
 
 @router.get("/{wallet_id}", response_model=Wallet)
-async def read_wallet(wallet_id: int, session: Annotated[AsyncSession, Depends(models.get_session)]) -> Wallet:
+async def read_wallet(wallet_id: int, request: Request, response: Response, session: Annotated[AsyncSession, Depends(models.get_read_session)]) -> Wallet:
     db_wallet = await session.get(DBWallet, wallet_id)
     if db_wallet:
+        etag = conditional.make_etag("wallet", db_wallet.id, db_wallet.version)
+        if conditional.matches(request, etag):
+            return conditional.not_modified(etag)
+        response.headers["ETag"] = etag
         return Wallet.model_validate(db_wallet)
     raise HTTPException(status_code=404, detail="Wallet not found")
 
+@router.get("/{wallet_id}/transactions", response_model=TransactionList)
+async def read_wallet_transactions(wallet_id: int, session: Annotated[AsyncSession, Depends(models.get_read_session)], paging: Annotated[pagination.Page, Depends(pagination.get_page)], start_date: datetime.datetime | None = None, end_date: datetime.datetime | None = None) -> TransactionList:
+    # served by ix_transactions_wallet_id_transaction_date
+    query = (
+        select(*pagination.columns(DBTransaction, Transaction, DBTransaction.transaction_date))
+        .where(DBTransaction.wallet_id == wallet_id)
+        .order_by(DBTransaction.transaction_date, DBTransaction.id)
+        .limit(paging.size + 1)
+    )
+    if start_date:
+        query = query.where(DBTransaction.transaction_date >= start_date)
+    if end_date:
+        query = query.where(DBTransaction.transaction_date < end_date)
+    if paging.after:
+        query = pagination.after_date_id(
+            query, DBTransaction.transaction_date, DBTransaction.id, paging.after
+        )
+    else:
+        query = query.offset(paging.offset)
+
+    result = await session.exec(query)
+    db_transactions, next_cursor = pagination.split_page(
+        result.all(), paging, lambda transaction: (transaction.transaction_date, transaction.id)
+    )
+    if not db_transactions and not await session.get(DBWallet, wallet_id):
+        raise HTTPException(status_code=404, detail="Wallet not found")
+
+    return pagination.page_response("transactions", db_transactions, None if paging.after else paging.page, None, paging.size, next_cursor, exclude={"transaction_date"})
+
 @router.put("/{wallet_id}", response_model=Wallet)
 async def update_wallet(wallet_id: int, current_user: Annotated[User, Depends(deps.get_current_user)], wallet: UpdateWallet, session: Annotated[AsyncSession, Depends(models.get_session)]) -> Wallet:
     db_wallet = await session.get(DBWallet, wallet_id)
     if db_wallet:
         for key, value in wallet.dict().items():
             setattr(db_wallet, key, value)
+        db_wallet.version += 1
         session.add(db_wallet)
         await session.commit()
         await session.refresh(db_wallet)
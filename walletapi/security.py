@@ -1,14 +1,15 @@
 import datetime
+import uuid
+
 import jwt
 
 from . import config
 
 ALGORITHM = "HS256"
 
-settings = config.get_settings()
-
 
 def create_access_token(data: dict, expires_delta: datetime.timedelta | None = None):
+    settings = config.get_settings()
     to_encode = data.copy()
     if expires_delta:
         expire = datetime.datetime.now(tz=datetime.timezone.utc) + expires_delta
@@ -25,6 +26,7 @@ def create_access_token(data: dict, expires_delta: datetime.timedelta | None = N
 def create_refresh_token(
     data: dict, expires_delta: datetime.timedelta | None = None
 ) -> str:
+    settings = config.get_settings()
     to_encode = data.copy()
     if expires_delta:
         expire = datetime.datetime.now(tz=datetime.timezone.utc) + expires_delta
@@ -32,6 +34,17 @@ def create_refresh_token(
         expire = datetime.datetime.now(tz=datetime.timezone.utc) + datetime.timedelta(
             minutes=settings.REFRESH_TOKEN_EXPIRE_MINUTES
         )
-    to_encode.update({"exp": expire})
+    # the jti is what rotation revokes
+    to_encode.update({"exp": expire, "type": "refresh", "jti": uuid.uuid4().hex})
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=ALGORITHM)
-    return encoded_jwt
\ No newline at end of file
+    return encoded_jwt
+
+
+def decode_refresh_token(token: str) -> dict:
+    settings = config.get_settings()
+    payload = jwt.decode(
+        token, settings.SECRET_KEY, algorithms=[ALGORITHM], options={"require": ["exp", "jti", "sub"]}
+    )
+    if payload.get("type") != "refresh":
+        raise jwt.InvalidTokenError("Not a refresh token")
+    return payload
\ No newline at end of file
@@ -0,0 +1,85 @@
+import collections
+import math
+import time
+
+
+class TokenBucketLimiter:
+    # One bucket per key, refilled at rate tokens per second up to burst.
+    # Least recently used keys are evicted first; an evicted key comes back
+    # with a full bucket, which is what an idle key would have anyway.
+
+    def __init__(self, rate: float, burst: int, maxsize: int = 100_000):
+        self.rate = rate
+        self.burst = burst
+        self.maxsize = maxsize
+        self.buckets = collections.OrderedDict()
+        self.allowed = 0
+        self.rejected = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.rate > 0 and self.burst > 0
+
+    def acquire(self, key) -> float:
+        # returns 0 when allowed, otherwise the seconds until a token is free
+        if not self.enabled:
+            return 0.0
+
+        now = time.monotonic()
+        tokens, updated = self.buckets.pop(key, (self.burst, now))
+        tokens = min(self.burst, tokens + (now - updated) * self.rate)
+
+        if tokens >= 1:
+            tokens -= 1
+            wait = 0.0
+            self.allowed += 1
+        else:
+            wait = (1 - tokens) / self.rate
+            self.rejected += 1
+
+        self.buckets[key] = (tokens, now)
+        while len(self.buckets) > self.maxsize:
+            self.buckets.popitem(last=False)
+            self.evictions += 1
+        return wait
+
+    def stats(self) -> dict:
+        return {
+            "keys": len(self.buckets),
+            "allowed": self.allowed,
+            "rejected": self.rejected,
+            "evictions": self.evictions,
+        }
+
+
+class LoginThrottledError(Exception):
+    def __init__(self, retry_after: float):
+        super().__init__("Too many login attempts")
+        self.retry_after = max(1, math.ceil(retry_after))
+
+
+by_username = TokenBucketLimiter(rate=0, burst=0)
+by_ip = TokenBucketLimiter(rate=0, burst=0)
+
+
+def init_throttle(settings):
+    global by_username, by_ip
+    by_username = TokenBucketLimiter(
+        settings.LOGIN_USERNAME_RATE / 60, settings.LOGIN_USERNAME_BURST, settings.LOGIN_THROTTLE_KEYS
+    )
+    by_ip = TokenBucketLimiter(
+        settings.LOGIN_IP_RATE / 60, settings.LOGIN_IP_BURST, settings.LOGIN_THROTTLE_KEYS
+    )
+
+
+def check_login(username: str, ip: str | None):
+    # both buckets are charged, so neither spraying one account from many
+    # addresses nor many accounts from one address gets through
+    wait = max(by_ip.acquire(ip), by_username.acquire(username.strip().lower()))
+    if wait > 0:
+        raise LoginThrottledError(wait)
+
+
+def stats() -> dict:
+    return {"username": by_username.stats(), "ip": by_ip.stats()}